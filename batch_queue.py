@@ -0,0 +1,167 @@
+import csv
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class BatchJob:
+    """One product moving through the batch stages"""
+
+    def __init__(self, product_id, folder=None):
+        self.product_id = product_id
+        self.folder = folder
+        self.stage = PENDING
+        self.error = None
+        # Anything a stage wants to hand to a later one (e.g. a FrameStream)
+        self.data = {}
+        self.timings = {}
+
+    def __repr__(self):
+        return f"BatchJob({self.product_id!r}, stage={self.stage!r})"
+
+
+class BatchPipeline:
+    """Runs product jobs through ordered stages, each with its own bounded worker pool.
+
+    `stages` is a list of (name, function, workers). A function takes the job
+    and returns True to pass it on; False or an exception fails the job. Each
+    stage hands over through a queue of at most `backlog` jobs, so a slow
+    upload holds capture back instead of piling up finished products.
+    `on_update(job)` is called from the worker threads on every stage change.
+    """
+
+    def __init__(self, stages, backlog=2, on_update=None):
+        self.stages = stages
+        self.on_update = on_update
+        self.queues = [queue.Queue(maxsize=0 if i == 0 else backlog) for i in range(len(stages))]
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads = []
+        for index, (name, function, workers) in enumerate(stages):
+            for n in range(workers):
+                thread = threading.Thread(target=self._worker, args=(index,), name=f"batch-{name}-{n}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, job):
+        with self.lock:
+            self.jobs.append(job)
+        self.queues[0].put(job)
+        return job
+
+    def _worker(self, index):
+        name, function, _ = self.stages[index]
+        while True:
+            job = self.queues[index].get()
+            try:
+                if job is None:
+                    return
+                if index == 0 and self.stopping.is_set():
+                    self._finish(job, FAILED, "batch cancelled")
+                    continue
+                self._set_stage(job, name)
+                started = time.monotonic()
+                try:
+                    passed = function(job)
+                    error = None if passed else f"{name} failed"
+                except Exception as e:
+                    passed = False
+                    error = f"{name} failed: {e}"
+                job.timings[name] = time.monotonic() - started
+                if not passed:
+                    logger.error(f"❌ {job.product_id}: {error}")
+                    self._finish(job, FAILED, error)
+                elif index + 1 < len(self.stages):
+                    self._set_stage(job, f"waiting for {self.stages[index + 1][0]}")
+                    # Blocks while the next stage's backlog is full
+                    self.queues[index + 1].put(job)
+                else:
+                    self._finish(job, DONE)
+            finally:
+                self.queues[index].task_done()
+
+    def _set_stage(self, job, stage):
+        job.stage = stage
+        if self.on_update:
+            self.on_update(job)
+
+    def _finish(self, job, stage, error=None):
+        job.error = error
+        self._set_stage(job, stage)
+
+    def cancel(self):
+        """Stop taking jobs into the first stage; jobs already past it still finish"""
+        self.stopping.set()
+
+    def wait(self):
+        """Block until every submitted job is done or failed, then stop the workers"""
+        for stage_queue in self.queues:
+            stage_queue.join()
+        for index, (_, _, workers) in enumerate(self.stages):
+            for _ in range(workers):
+                self.queues[index].put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        return self.report()
+
+    def counts(self):
+        with self.lock:
+            jobs = list(self.jobs)
+        counts = {}
+        for job in jobs:
+            counts[job.stage] = counts.get(job.stage, 0) + 1
+        return counts
+
+    def report(self):
+        """One line per product: result, error and time spent per stage"""
+        lines = []
+        with self.lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            timings = ", ".join(f"{name} {seconds:.0f}s" for name, seconds in job.timings.items())
+            result = "OK" if job.stage == DONE else f"FAILED ({job.error})"
+            lines.append(f"{job.product_id}: {result} [{timings}]")
+        return lines
+
+
+def parse_product_ids(text):
+    """Product IDs from free text: one per line, or separated by commas, semicolons or spaces"""
+    product_ids = []
+    for token in text.replace(',', ' ').replace(';', ' ').split():
+        if token not in product_ids:
+            product_ids.append(token)
+    return product_ids
+
+
+# Header names recognised as the product ID column of a CSV
+PRODUCT_ID_COLUMNS = ("product_id", "id", "idt", "product")
+
+
+def read_product_ids(path):
+    """Product IDs from a CSV (the product ID column, or the first one) or a plain list file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        text = f.read()
+    if not path.lower().endswith('.csv'):
+        return parse_product_ids(text)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    rows = [row for row in csv.reader(text.splitlines(), dialect) if row and row[0].strip()]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(name) for name in PRODUCT_ID_COLUMNS if name in header), None)
+    if column is None:
+        column = 0
+    else:
+        rows = rows[1:]
+    return parse_product_ids("\n".join(row[column].strip() for row in rows if len(row) > column))
@@ -0,0 +1,120 @@
+"""Compare memory and CPU of the uploader's browser profiles.
+
+    python browser_benchmark.py [--profiles full light] [--login] [--url URL ...]
+
+For each profile starts Chrome the way the uploader does, optionally logs in,
+loads the given panel pages and reports wall time, peak RSS and CPU time of
+the whole Chrome process tree. RSS and CPU need psutil (pip install psutil);
+without it only the times are shown.
+
+Results: not measured yet. The only run so far was on a machine where
+neither Chrome nor chromedriver could be installed, so it produced no
+numbers and uploader.BROWSER_PROFILE stays "full". Run it on the station PC
+(python browser_benchmark.py --login) and note the table here before
+switching to "light".
+"""
+import argparse
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from selenium.common.exceptions import WebDriverException
+
+import uploader
+from page_waits import wait_until_idle
+
+PROFILES = ("full", "light")
+SAMPLE_INTERVAL = 0.2
+
+
+class ProcessTreeSampler:
+    """Samples the summed RSS of a process and its children in the background"""
+
+    def __init__(self, pid):
+        self.root = psutil.Process(pid)
+        self.peak_rss = 0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def processes(self):
+        try:
+            return [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def run(self):
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            rss = 0
+            for process in self.processes():
+                try:
+                    rss += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def cpu_seconds(self):
+        seconds = 0.0
+        for process in self.processes():
+            try:
+                times = process.cpu_times()
+                seconds += times.user + times.system
+            except psutil.Error:
+                pass
+        return seconds
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+
+def benchmark_profile(profile, urls, login):
+    """Returns (seconds, peak RSS in bytes or None, CPU seconds or None)"""
+    started = time.perf_counter()
+    driver = uploader.create_driver(profile)
+    sampler = ProcessTreeSampler(driver.service.process.pid) if psutil else None
+    try:
+        if login:
+            uploader.login(driver)
+        for url in urls:
+            driver.get(url)
+            wait_until_idle(driver, timeout=60)
+        seconds = time.perf_counter() - started
+        if sampler is None:
+            return seconds, None, None
+        # Read CPU time before quitting, while the renderer processes still exist
+        cpu_seconds = sampler.cpu_seconds()
+        sampler.stop()
+        return seconds, sampler.peak_rss, cpu_seconds
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the uploader's browser profiles")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=PROFILES)
+    parser.add_argument("--login", action="store_true", help="log in with uploader.USERNAME/PASSWORD first")
+    parser.add_argument("--url", nargs="+", default=[uploader.WEBSITE_URL], help="pages to load")
+    args = parser.parse_args()
+
+    if psutil is None:
+        print("psutil is not installed, reporting times only")
+    print(f"{'profile':<10}{'time [s]':>10}{'peak RSS [MB]':>15}{'CPU [s]':>10}")
+    for profile in args.profiles:
+        try:
+            seconds, peak_rss, cpu_seconds = benchmark_profile(profile, args.url, args.login)
+        except WebDriverException as e:
+            print(f"Could not run Chrome with the {profile} profile: {e.msg}")
+            return 1
+        rss_text = f"{peak_rss / 2 ** 20:.0f}" if peak_rss is not None else "-"
+        cpu_text = f"{cpu_seconds:.1f}" if cpu_seconds is not None else "-"
+        print(f"{profile:<10}{seconds:>10.2f}{rss_text:>15}{cpu_text:>10}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
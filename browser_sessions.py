@@ -0,0 +1,117 @@
+import atexit
+import threading
+from contextlib import contextmanager
+
+from http_uploader import load_cookies, save_cookies
+
+
+class BrowserSessionPool:
+    """Keeps up to `size` logged-in browsers open between uploads.
+
+    `create_driver()` starts a browser, `login(driver)` signs it in and
+    `is_logged_in(driver)` checks the current session. Cookies are saved to
+    disk after each login and put back into new browsers, so the panel login
+    form is only used when the stored session has actually expired.
+    """
+
+    def __init__(self, create_driver, login, is_logged_in, start_url, size=1, cookie_key="panel_browser"):
+        self.create_driver = create_driver
+        self.login = login
+        self.is_logged_in = is_logged_in
+        self.start_url = start_url
+        self.size = size
+        self.cookie_key = cookie_key
+        self.idle = []
+        self.drivers = []
+        # Drivers open or being started; a slot is freed when a broken driver is closed
+        self.open_count = 0
+        self.condition = threading.Condition()
+        atexit.register(self.close)
+
+    def acquire(self):
+        """A logged-in driver: an idle one, a new one while below `size`, or the next one freed"""
+        with self.condition:
+            while not self.idle and self.open_count >= self.size:
+                self.condition.wait()
+            if self.idle:
+                driver = self.idle.pop()
+            else:
+                driver = None
+                self.open_count += 1
+        new = driver is None
+        if new:
+            try:
+                driver = self.create_driver()
+            except Exception:
+                with self.condition:
+                    self.open_count -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.drivers.append(driver)
+        try:
+            if new:
+                self.restore_cookies(driver)
+            self.ensure_logged_in(driver)
+        except Exception:
+            self.release(driver, broken=True)
+            raise
+        return driver
+
+    def release(self, driver, broken=False):
+        """Hand a driver back; a broken one is closed and its slot freed for a new one"""
+        with self.condition:
+            if not broken:
+                self.idle.append(driver)
+            elif driver in self.drivers:
+                self.drivers.remove(driver)
+                self.open_count -= 1
+            self.condition.notify()
+        if broken:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    @contextmanager
+    def session(self):
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def restore_cookies(self, driver):
+        cookies = load_cookies(self.cookie_key)
+        if not cookies:
+            return
+        # Cookies can only be set for the domain the browser is on
+        driver.get(self.start_url)
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                pass
+
+    def ensure_logged_in(self, driver):
+        if self.is_logged_in(driver):
+            return
+        print("Browser session expired, logging in...")
+        self.login(driver)
+        save_cookies(self.cookie_key, driver.get_cookies())
+
+    def close(self):
+        with self.condition:
+            drivers, self.drivers = self.drivers, []
+            self.idle = []
+            self.open_count = 0
+            self.condition.notify_all()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -56,6 +56,18 @@ def build_executable():
         '--add-data=hardware_handler.py;.',
         '--add-data=webp_handler.py;.',
         '--add-data=uploader.py;.',
+        '--add-data=gphoto_session.py;.',
+        '--add-data=table_controller.py;.',
+        '--add-data=settings.py;.',
+        '--add-data=usb_inventory.py;.',
+        '--add-data=device_monitor.py;.',
+        '--add-data=capture_retry.py;.',
+        '--add-data=capture_files.py;.',
+        '--add-data=image_pipeline.py;.',
+        '--add-data=batch_queue.py;.',
+        '--add-data=http_uploader.py;.',
+        '--add-data=browser_sessions.py;.',
+        '--add-data=page_waits.py;.',
         '--hidden-import=PyQt6.QtCore',
         '--hidden-import=PyQt6.QtGui',
         '--hidden-import=PyQt6.QtWidgets',
@@ -0,0 +1,147 @@
+import os
+import re
+import queue
+import shutil
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "zdjecie_01_003.jpg" -> ("zdjecie_01", 3, ".jpg")
+SUFFIX_RE = re.compile(r'^(.*)_(\d{3,})(\.[^.]*)$')
+INCOMING_DIR = '.incoming'
+# On the WSL ext4 file system, so gphoto2 does not write through the /mnt/c bridge
+DEFAULT_STAGING_DIR = '/tmp/360operator-staging'
+
+
+class FilenameAllocator:
+    """Unique capture file names for one folder, from a single directory scan.
+
+    Names are reserved in memory as they are handed out, so choosing a name
+    never touches the (possibly /mnt/c) file system again. Frames are written
+    under INCOMING_DIR and renamed into place by commit(), so a half-written
+    file never occupies a final name.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.incoming_dir = os.path.join(folder, INCOMING_DIR)
+        self.used = set()
+        self.next_suffix = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                self._mark_used(entry.name)
+
+    def _mark_used(self, name):
+        # Windows file names are case-insensitive
+        key = name.lower()
+        self.used.add(key)
+        match = SUFFIX_RE.match(key)
+        if match:
+            stem = match.group(1) + match.group(3)
+            self.next_suffix[stem] = max(self.next_suffix.get(stem, 1), int(match.group(2)) + 1)
+
+    def allocate(self, filename):
+        """Reserve and return a free path for `filename`, adding _001, _002, ... on clashes"""
+        base, ext = os.path.splitext(filename)
+        stem = filename.lower()
+        with self.lock:
+            name = filename
+            if stem in self.used:
+                counter = self.next_suffix.get(stem, 1)
+                name = f"{base}_{counter:03d}{ext}"
+                while name.lower() in self.used:
+                    counter += 1
+                    name = f"{base}_{counter:03d}{ext}"
+            self._mark_used(name)
+            return os.path.join(self.folder, name)
+
+    def release(self, path):
+        """Give back a name whose frame was never written"""
+        with self.lock:
+            self.used.discard(os.path.basename(path).lower())
+
+    def incoming_path(self, path):
+        """Where the frame for `path` is written before it is committed"""
+        return os.path.join(self.incoming_dir, os.path.basename(path))
+
+    def commit(self, written_path, path):
+        """Atomically move a completely written frame to its final name"""
+        os.replace(written_path, path)
+
+    def close(self):
+        """Remove the incoming folder once every frame has been committed"""
+        try:
+            os.rmdir(self.incoming_dir)
+        except OSError:
+            pass  # Leftover partial frames stay for inspection
+
+
+class StagingArea:
+    """Folder on the camera side's native file system that captures land in first.
+
+    gphoto2 writes each frame to `camera_dir` (a Linux path inside WSL); a
+    background thread then moves it, through `local_dir` (the same folder as
+    this process sees it, e.g. under \\\\wsl$), to the Windows save
+    folder. The slow cross-file-system copy is taken off the capture path.
+    `on_saved` is called with each final path once its move is done.
+    """
+
+    def __init__(self, camera_dir, local_dir, on_saved=None):
+        self.camera_dir = camera_dir
+        self.local_dir = local_dir
+        self.on_saved = on_saved
+        self.queue = queue.Queue()
+        self.failed = []
+        self.submitted = 0
+        self.done = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def camera_path(self, name):
+        return f"{self.camera_dir.rstrip('/')}/{name}"
+
+    def claim(self, name, unique_name):
+        """Rename a staged file to `unique_name` before the camera reuses its name (e.g. capt0000.jpg)"""
+        if name != unique_name:
+            os.replace(os.path.join(self.local_dir, name), os.path.join(self.local_dir, unique_name))
+        return unique_name
+
+    def submit(self, name, path, allocator):
+        """Queue staged file `name` for a move to `path`, reserved in `allocator`"""
+        self.submitted += 1
+        self.queue.put((name, path, allocator))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                name, path, allocator = item
+                incoming_path = allocator.incoming_path(path)
+                try:
+                    shutil.move(os.path.join(self.local_dir, name), incoming_path)
+                    allocator.commit(incoming_path, path)
+                    logger.info(f"✅ Photo saved to {path}")
+                    if self.on_saved:
+                        self.on_saved(path)
+                except OSError as e:
+                    logger.error(f"❌ Transfer of {name} to {path} failed: {e}")
+                    allocator.release(path)
+                    self.failed.append(path)
+                self.done += 1
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        """Block until every staged frame has been moved; True if none failed"""
+        self.queue.join()
+        failed, self.failed = self.failed, []
+        return not failed
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join(timeout=5)
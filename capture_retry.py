@@ -0,0 +1,96 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Error classes, from gphoto2's stderr/shell output
+BUSY = "busy"
+TIMEOUT = "timeout"
+PTP = "ptp"
+IO = "io"
+DOWNLOAD = "download"
+UNKNOWN = "unknown"
+
+# Recovery actions, cheapest first
+RETRIGGER = "retrigger"
+REDOWNLOAD = "redownload"
+REOPEN_SESSION = "reopen_session"
+RESET_USB = "reset_usb"
+
+ERROR_PATTERNS = [
+    (BUSY, ('device busy', 'i/o in progress', 'resource busy', '0x2019')),
+    (TIMEOUT, ('timeout', 'timed out')),
+    (PTP, ('ptp',)),
+    (IO, ('i/o', 'could not claim', 'libusb', 'no camera found', 'could not detect',
+          'could not find the requested device', 'unknown model')),
+]
+
+# What to do after the 1st, 2nd, ... consecutive failure of a class on the same frame
+RECOVERY_LADDER = {
+    BUSY: [RETRIGGER, RETRIGGER, REOPEN_SESSION, RESET_USB],
+    DOWNLOAD: [REDOWNLOAD, REOPEN_SESSION, RESET_USB],
+    TIMEOUT: [REOPEN_SESSION, RESET_USB],
+    PTP: [REOPEN_SESSION, RESET_USB],
+    IO: [RESET_USB],
+    UNKNOWN: [RETRIGGER, REOPEN_SESSION, RESET_USB],
+}
+
+BASE_DELAYS = {BUSY: 0.3, DOWNLOAD: 0.2, TIMEOUT: 0.5, PTP: 0.5, IO: 0.0, UNKNOWN: 0.5}
+MAX_DELAY = 4.0
+
+
+class CaptureError(Exception):
+    """One failed capture attempt; `camera_file` is set when the shot exists but its download failed"""
+
+    def __init__(self, message, camera_file=None):
+        super().__init__(message)
+        self.camera_file = camera_file
+        self.error_class = DOWNLOAD if camera_file else classify_error(message)
+
+
+def classify_error(message):
+    text = (message or '').lower()
+    for error_class, patterns in ERROR_PATTERNS:
+        if any(pattern in text for pattern in patterns):
+            return error_class
+    return UNKNOWN
+
+
+class CaptureRetryPolicy:
+    """Chooses the cheapest recovery per error class and adapts back-off across frames"""
+
+    def __init__(self, max_attempts=4):
+        self.max_attempts = max_attempts
+        self.delays = dict(BASE_DELAYS)
+        self.stats = {error_class: {'errors': 0, 'recovered': 0, 'failed': 0} for error_class in BASE_DELAYS}
+        self.actions = {action: 0 for action in (RETRIGGER, REDOWNLOAD, REOPEN_SESSION, RESET_USB)}
+
+    def next_action(self, error_class, history):
+        """Recovery for the latest failure, escalating with repeats of the same class"""
+        ladder = RECOVERY_LADDER[error_class]
+        repeats = history.count(error_class)
+        action = ladder[min(repeats, len(ladder)) - 1]
+        self.stats[error_class]['errors'] += 1
+        self.actions[action] += 1
+        return action
+
+    def backoff(self, error_class):
+        """Delay before the next attempt; grows while a class keeps failing"""
+        delay = self.delays[error_class]
+        self.delays[error_class] = min(max(delay * 2, 0.1), MAX_DELAY) if delay else 0.0
+        return delay
+
+    def record_result(self, history, success):
+        """Account for a finished frame and relax back-off for classes that recovered"""
+        for error_class in set(history):
+            self.stats[error_class]['recovered' if success else 'failed'] += 1
+            if success:
+                self.delays[error_class] = max(BASE_DELAYS[error_class], self.delays[error_class] / 2)
+
+    def summary(self):
+        seen = {name: counts for name, counts in self.stats.items() if counts['errors']}
+        if not seen:
+            return "no capture errors"
+        classes = ", ".join(f"{name}: {c['errors']} errors/{c['recovered']} recovered/{c['failed']} failed"
+                            for name, c in seen.items())
+        actions = ", ".join(f"{name}={count}" for name, count in self.actions.items() if count)
+        return f"{classes}; recoveries {actions}"
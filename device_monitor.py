@@ -0,0 +1,79 @@
+import subprocess
+import time
+import logging
+
+from usb_inventory import usb_inventory
+
+logger = logging.getLogger(__name__)
+
+
+class AutoDetectSource:
+    """Reports whether gphoto2 can see a camera, via `gphoto2 --auto-detect`"""
+
+    def __init__(self, gphoto_command=None):
+        self.gphoto_command = list(gphoto_command or ['wsl', 'gphoto2'])
+
+    def camera_present(self):
+        try:
+            result = subprocess.run(self.gphoto_command + ['--auto-detect'],
+                                    capture_output=True, text=True, timeout=10)
+        except Exception as e:
+            logger.debug(f"auto-detect failed: {e}")
+            return False
+        return result.returncode == 0 and 'usb' in result.stdout.lower()
+
+
+class FakeDeviceEvents:
+    """Stand-in device source for running without a camera.
+
+    unplug(seconds) makes the camera disappear and come back after `seconds`,
+    the way a usbipd detach/attach cycle does.
+    """
+
+    def __init__(self, present=True):
+        self.present_at = time.monotonic() if present else float('inf')
+        self.checks = 0
+
+    def unplug(self, seconds):
+        self.present_at = time.monotonic() + seconds
+
+    def plug_in(self):
+        self.present_at = time.monotonic()
+
+    def camera_present(self):
+        self.checks += 1
+        return time.monotonic() >= self.present_at
+
+
+def wait_until(condition, timeout=15, initial_delay=0.1, max_delay=1.0, factor=1.5):
+    """Poll `condition` with exponential backoff; True as soon as it holds, False on timeout"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        if condition():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * factor, max_delay)
+
+
+def wait_for_camera(source, timeout=15):
+    """Block until `source` reports the camera enumerated; False on timeout"""
+    started = time.monotonic()
+    if wait_until(source.camera_present, timeout=timeout):
+        logger.info(f"📷 Camera ready after {time.monotonic() - started:.1f}s")
+        return True
+    logger.warning(f"Camera did not appear within {timeout}s")
+    return False
+
+
+def wait_for_usb_state(busid, attached, timeout=5):
+    """Block until usbipd reports `busid` attached to WSL (or no longer attached)"""
+    def state_reached():
+        device = next((d for d in usb_inventory.devices(refresh=True) or [] if d.busid == busid), None)
+        if device is None:
+            return not attached
+        return device.attached == attached
+    return wait_until(state_reached, timeout=timeout, initial_delay=0.05, max_delay=0.5)
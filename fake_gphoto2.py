@@ -0,0 +1,167 @@
+"""Stand-in for gphoto2 so the capture code can run without a camera.
+
+Point HardwareManager at it with
+    HardwareManager(gphoto_command=[sys.executable, 'fake_gphoto2.py'])
+
+It understands the one-shot options used by hardware_handler
+(--auto-detect, --capture-image-and-download --filename=..., --set-config)
+and the `--shell` mode used by GPhotoSession, including capture-image/get
+for pipelined downloads. FAKE_GPHOTO2_ERRORS injects failures ("busy", "ptp",
+"timeout", "io", "download") into the next shell commands. FAKE_GPHOTO2_FILENAME
+gives every capture the same camera file name, like Canon bodies shooting to
+RAM (capt0000.jpg).
+"""
+import os
+import shlex
+import sys
+import time
+
+CAMERA_FOLDER = '/store_00020001/DCIM/100CANON'
+CAPTURE_DELAY = float(os.environ.get('FAKE_GPHOTO2_DELAY', '0.05'))
+TRANSFER_DELAY = float(os.environ.get('FAKE_GPHOTO2_TRANSFER_DELAY', '0.05'))
+# Comma-separated failures to inject into the next shell commands, e.g. "busy,download"
+INJECTED_ERRORS = [e for e in os.environ.get('FAKE_GPHOTO2_ERRORS', '').split(',') if e]
+ERROR_MESSAGES = {
+    'busy': "*** Error (-110: 'I/O in progress') ***",
+    'ptp': "*** Error: PTP General Error ***",
+    'timeout': "*** Error (-10: 'Timeout reading from or writing to the port') ***",
+    'io': "*** Error (-52: 'Could not find the requested device on the USB port') ***",
+    'download': "*** Error (-1: 'Unspecified error') ***",
+}
+# Camera file name reused for every capture, e.g. "capt0000.jpg"; empty for IMG_NNNN.JPG
+FIXED_NAME = os.environ.get('FAKE_GPHOTO2_FILENAME', '')
+# Smallest JPEG-looking payload: SOI, a comment and EOI markers
+JPEG_BYTES = b'\xff\xd8\xff\xfe\x00\x0efake gphoto2\xff\xd9'
+
+
+def frame_bytes(number):
+    """JPEG payload tagged with the capture number after EOI, so frames can be told apart"""
+    return JPEG_BYTES + f"frame {number}".encode()
+
+
+class FakeCamera:
+    def __init__(self):
+        self.counter = 0
+        # Files captured with capture-image, waiting on the card; with FIXED_NAME several
+        # captures share a path and are handed out oldest first
+        self.card = {}
+
+    def next_name(self):
+        self.counter += 1
+        return FIXED_NAME or f"IMG_{self.counter:04d}.JPG"
+
+    def capture(self, path):
+        time.sleep(CAPTURE_DELAY + TRANSFER_DELAY)
+        with open(path, 'wb') as f:
+            f.write(frame_bytes(self.counter))
+
+    def capture_to_card(self):
+        time.sleep(CAPTURE_DELAY)
+        name = self.next_name()
+        path = f"/{name}" if FIXED_NAME else f"{CAMERA_FOLDER}/{name}"
+        self.card.setdefault(path, []).append(frame_bytes(self.counter))
+        return path
+
+
+def injected_error(download):
+    """Next injected failure for a capture (or, with download=True, a get) command"""
+    if INJECTED_ERRORS and (INJECTED_ERRORS[0] == 'download') == download:
+        return ERROR_MESSAGES[INJECTED_ERRORS.pop(0)]
+    return None
+
+
+def run_shell(camera, force_overwrite=False):
+    local_dir = os.getcwd()
+    out = sys.stdout
+
+    def prompt():
+        out.write(f"gphoto2: {{{local_dir}}} /> ")
+        out.flush()
+
+    prompt()
+    for line in sys.stdin:
+        try:
+            args = shlex.split(line)
+        except ValueError:
+            args = line.split()
+        if not args:
+            prompt()
+            continue
+        cmd, params = args[0], args[1:]
+
+        if cmd in ('exit', 'quit', 'q'):
+            return 0
+        error = injected_error(cmd == 'get') if cmd in ('capture-image-and-download', 'capture-image', 'get') else None
+
+        if error:
+            out.write(error + "\n")
+        elif cmd == 'lcd':
+            target = params[0] if params else os.path.expanduser('~')
+            if os.path.isdir(target):
+                local_dir = target
+                out.write(f"Local directory now '{local_dir}'.\n")
+            else:
+                out.write(f"*** Error: Could not change to local directory '{target}'.\n")
+        elif cmd == 'capture-image-and-download':
+            name = camera.next_name()
+            dest = os.path.join(local_dir, name)
+            if os.path.exists(dest) and not force_overwrite:
+                out.write(f"*** Error: File {name} exists.\n")
+            else:
+                camera.capture(dest)
+                out.write(f"Saving file as {name}\n")
+        elif cmd == 'capture-image':
+            path = camera.capture_to_card()
+            out.write(f"New file is in location {path} on the camera\n")
+        elif cmd == 'get':
+            path = params[0] if params else ''
+            if path not in camera.card:
+                out.write(f"*** Error: File '{path}' does not exist.\n")
+            else:
+                name = path.rsplit('/', 1)[-1]
+                time.sleep(TRANSFER_DELAY)
+                with open(os.path.join(local_dir, name), 'wb') as f:
+                    f.write(camera.card[path][0])
+                out.write(f"Saving file as {name}\n")
+        elif cmd == 'delete':
+            files = camera.card.get(params[0] if params else '')
+            if not files:
+                out.write("*** Error: File does not exist.\n")
+            else:
+                files.pop(0)
+                if not files:
+                    del camera.card[params[0]]
+        elif cmd == 'set-config':
+            pass
+        else:
+            out.write(f"*** Error: Unknown command '{cmd}'.\n")
+        prompt()
+    return 0
+
+
+def main(argv):
+    camera = FakeCamera()
+    force_overwrite = '--force-overwrite' in argv
+    if '--shell' in argv:
+        return run_shell(camera, force_overwrite)
+    if '--auto-detect' in argv:
+        print("Model                          Port")
+        print("----------------------------------------------------------")
+        print("Fake Canon EOS (PTP mode)      usb:001,004")
+        return 0
+    if '--capture-image-and-download' in argv:
+        filename = None
+        for arg in argv:
+            if arg.startswith('--filename='):
+                filename = arg.split('=', 1)[1]
+        camera.capture(filename or camera.next_name())
+        print(f"Saving file as {filename}")
+        return 0
+    if '--set-config' in argv or '--trigger-capture' in argv:
+        return 0
+    print(f"*** Error: Unsupported arguments {argv}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,154 @@
+import re
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# gphoto2 --shell prints "gphoto2: {<local dir>} <camera dir>> " after every command
+PROMPT_RE = re.compile(r'gphoto2: \{[^}]*\} [^\n]*> $')
+SAVED_RE = re.compile(r'Saving file as (.+)')
+NEW_FILE_RE = re.compile(r'New file is in location (\S+) on the camera')
+ERROR_MARKERS = ('*** Error', 'ERROR:')
+
+
+class GPhotoSessionError(Exception):
+    """Raised when the gphoto2 shell is not running or a command fails"""
+
+
+class GPhotoSession:
+    """Long-lived `gphoto2 --shell` process fed commands through a pipe.
+
+    Opening the camera once per turntable run avoids paying for WSL startup,
+    PTP session open and camera enumeration on every frame.
+    """
+
+    def __init__(self, command=None, open_timeout=15):
+        self.command = list(command or ['wsl', 'gphoto2']) + ['--force-overwrite', '--shell']
+        self.open_timeout = open_timeout
+        self.process = None
+        self.local_dir = None
+        self._buffer = ''
+        self._cond = threading.Condition()
+        self._lock = threading.RLock()
+        self._reader = None
+
+    def open(self):
+        """Start the shell and wait for its first prompt"""
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        self._buffer = ''
+        self.local_dir = None
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+        try:
+            self._wait_for_prompt(self.open_timeout)
+        except GPhotoSessionError:
+            self.close()
+            raise
+        logger.info("📷 gPhoto2 session opened")
+        return True
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _read_output(self):
+        stream = self.process.stdout
+        while True:
+            chunk = stream.read1(4096)
+            with self._cond:
+                if not chunk:
+                    self._cond.notify_all()
+                    return
+                self._buffer += chunk.decode('utf-8', errors='replace').replace('\r', '')
+                self._cond.notify_all()
+
+    def _wait_for_prompt(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not PROMPT_RE.search(self._buffer):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise GPhotoSessionError(f"Timed out waiting for gphoto2 prompt: {self._buffer[-200:]!r}")
+                if not self.is_alive():
+                    raise GPhotoSessionError(f"gphoto2 shell exited: {self._buffer[-200:]!r}")
+                self._cond.wait(min(remaining, 0.5))
+            match = PROMPT_RE.search(self._buffer)
+            output = self._buffer[:match.start()]
+            self._buffer = ''
+        return output
+
+    def run(self, command, timeout=25):
+        """Send one shell command and return its output, raising on gphoto2 errors"""
+        with self._lock:
+            if not self.is_alive():
+                raise GPhotoSessionError("gphoto2 shell is not running")
+            try:
+                self.process.stdin.write((command + '\n').encode('utf-8'))
+                self.process.stdin.flush()
+            except OSError as e:
+                raise GPhotoSessionError(f"Failed to write to gphoto2 shell: {e}")
+            output = self._wait_for_prompt(timeout)
+
+        # The shell echoes nothing back, but drop the command line if a pty did
+        if output.startswith(command):
+            output = output[len(command):]
+        if any(marker in output for marker in ERROR_MARKERS):
+            raise GPhotoSessionError(output.strip())
+        return output
+
+    def change_local_dir(self, local_dir):
+        """Point downloads at `local_dir` (a path as seen by gphoto2)"""
+        if local_dir != self.local_dir:
+            self.run(f'lcd "{local_dir}"', timeout=5)
+            self.local_dir = local_dir
+
+    def capture_and_download(self, local_dir, timeout=25):
+        """Capture one frame into `local_dir` and return the file name gphoto2 saved"""
+        self.change_local_dir(local_dir)
+        output = self.run('capture-image-and-download', timeout=timeout)
+        match = SAVED_RE.search(output)
+        if not match:
+            raise GPhotoSessionError(f"No file saved: {output.strip()}")
+        return match.group(1).strip()
+
+    def capture_image(self, timeout=25):
+        """Fire the shutter and return the file's path on the camera without downloading it"""
+        output = self.run('capture-image', timeout=timeout)
+        match = NEW_FILE_RE.search(output)
+        if not match:
+            raise GPhotoSessionError(f"No new file reported: {output.strip()}")
+        return match.group(1)
+
+    def download(self, camera_file, local_dir, delete=True, timeout=60):
+        """Download `camera_file` into `local_dir` and return the saved file name"""
+        with self._lock:
+            self.change_local_dir(local_dir)
+            output = self.run(f'get "{camera_file}"', timeout=timeout)
+            if delete:
+                try:
+                    self.run(f'delete "{camera_file}"', timeout=10)
+                except GPhotoSessionError as e:
+                    logger.debug(f"Could not delete {camera_file} from camera: {e}")
+        match = SAVED_RE.search(output)
+        if not match:
+            raise GPhotoSessionError(f"No file saved: {output.strip()}")
+        return match.group(1).strip()
+
+    def close(self):
+        """Exit the shell, killing it if it does not leave on its own"""
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.write(b'exit\n')
+                self.process.stdin.flush()
+                self.process.wait(timeout=3)
+        except Exception:
+            self.process.kill()
+        self.process = None
+        self.local_dir = None
+        logger.info("📷 gPhoto2 session closed")
@@ -7,15 +7,68 @@ import time
 import logging
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor
+from serial.tools import list_ports
+
+from gphoto_session import GPhotoSession, GPhotoSessionError
+from table_controller import (SerialEngine, TablePositioner, TableControllerError, build_frame, is_valid_frame,
+                              TMCL_GAP, AP_ACTUAL_POSITION)
+from settings import load_settings, update_settings
+from usb_inventory import usb_inventory
+from device_monitor import AutoDetectSource, wait_for_camera, wait_for_usb_state
+from capture_retry import CaptureError, CaptureRetryPolicy, REDOWNLOAD, REOPEN_SESSION, RESET_USB
+from capture_files import FilenameAllocator, StagingArea
 
 # Setup logging for debugging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# USB VID:PID pairs of the USB-serial bridges the Table360 controller has shipped with
+CONTROLLER_USB_IDS = {
+    (0x2A3C, 0x0100),  # Trinamic
+    (0x0403, 0x6001),  # FTDI FT232R
+    (0x0403, 0x6015),  # FTDI FT231X
+    (0x10C4, 0xEA60),  # Silicon Labs CP210x
+    (0x1A86, 0x7523),  # WCH CH340
+    (0x067B, 0x2303),  # Prolific PL2303
+}
+
 class HardwareManager:
-    def __init__(self, save_folder=None):
+    def __init__(self, save_folder=None, gphoto_command=None, capture_mode="sequential", staging_dir=None):
         self.serial_conn = None
+        self.serial_engine = None
+        # Cleared once the controller is found not to acknowledge commands
+        self.expect_acks = True
+        self.ack_timeout = 0.5
         self.save_folder = save_folder or os.getcwd()
+        # Command prefix used to reach gphoto2, e.g. [sys.executable, 'fake_gphoto2.py'] without a camera
+        self.gphoto_command = list(gphoto_command or ['wsl', 'gphoto2'])
+        self.camera_session = None
+        self.session_wanted = False
+        # Held while the shell is opened, dropped or used, so the capture thread and the
+        # FrameDownloader never see it half-closed or start a second gphoto2 shell
+        self.session_lock = threading.RLock()
+        # Where camera readiness comes from; swap for device_monitor.FakeDeviceEvents without hardware
+        self.device_source = AutoDetectSource(self.gphoto_command)
+        self.retry_policy = CaptureRetryPolicy()
+        self.camera_busid = None
+        self.downloader = None
+        # "sequential" downloads each frame before moving on, "pipelined" downloads in the background,
+        # "burst" leaves every frame on the card and downloads them all once rotation is done
+        self.capture_mode = capture_mode
+        self.burst_frames = []
+        self.progress_callback = None
+        # Per-session index of used names in save_folder, rebuilt when the session ends
+        self.file_allocator = None
+        # Linux-side folder (e.g. capture_files.DEFAULT_STAGING_DIR) gphoto2 writes to before
+        # frames are moved to save_folder in the background; None writes straight to save_folder
+        self.staging_dir = staging_dir
+        self.staging = None
+        # Called with the final path of every frame once it is completely on disk
+        self.frame_callback = None
+        # "closed-loop" moves exact angles and waits for the controller, "timed" runs the motor for a fixed time
+        self.positioning = "closed-loop"
+        self.positioner = None
         self.COMMANDS = {
             "Stop": bytes.fromhex("010300000000000004"),
             "Lewo ciągle": bytes.fromhex("010100000000006466"),
@@ -31,6 +84,9 @@ class HardwareManager:
             "cos3": bytes.fromhex("020400000005319eda"),
             "cos4": bytes.fromhex("020601000000000009"),
         }
+        for name, frame in self.COMMANDS.items():
+            if not is_valid_frame(frame):
+                logger.error(f"❌ Command frame '{name}' has a bad checksum: {frame.hex()}")
         # self.initialize_hardware()
 
     def pre_focus_camera(self):
@@ -38,7 +94,7 @@ class HardwareManager:
         try:
             # Half-press shutter to focus (simulate with gphoto2)
             result = subprocess.run(
-                ['wsl', 'gphoto2', '--trigger-capture'],
+                self.gphoto_command + ['--trigger-capture'],
                 capture_output=True, text=True, timeout=10
             )
             time.sleep(0.5)  # Short delay for focus
@@ -54,28 +110,22 @@ class HardwareManager:
         return success
 
     def initialize_serial(self, preferred_port='COM3'):
-        """Initialize serial connection, trying multiple COM ports if needed"""
-        # List of COM ports to try, starting with the preferred one
-        ports_to_try = [preferred_port] + [f'COM{i}' for i in range(1, 11) if f'COM{i}' != preferred_port]
+        """Connect to the controller: last working port first, then all candidates probed in parallel"""
+        last_port = load_settings().get('serial_port')
+        if last_port and self.open_serial(last_port):
+            return True
 
-        for port in ports_to_try:
-            try:
-                logger.info(f"Attempting to connect to {port}...")
-                self.serial_conn = serial.Serial(
-                    port=port,
-                    baudrate=19200,
-                    timeout=1,
-                    write_timeout=1
-                )
-                # Test the connection by sending a stop command
-                self.serial_conn.write(self.COMMANDS["Stop"])
-                logger.info(f"✅ Serial connection established on {port}")
-                return True
-            except Exception as e:
-                logger.error(f"❌ Serial connection failed on {port}: {str(e)}")
-                if self.serial_conn:
-                    self.serial_conn.close()
-                    self.serial_conn = None
+        candidates = [port for port in self.serial_candidates(preferred_port) if port != last_port]
+        if candidates:
+            with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+                results = dict(zip(candidates, pool.map(self.probe_port, candidates)))
+            # Ports that answered the handshake first, then ports that merely opened
+            ordered = ([port for port in candidates if results[port] == 'answered'] +
+                       [port for port in candidates if results[port] == 'opened'])
+            for port in ordered:
+                if self.open_serial(port):
+                    update_settings(serial_port=port)
+                    return True
 
         logger.error("❌ Could not establish serial connection on any port")
         error_msg = (
@@ -90,6 +140,63 @@ class HardwareManager:
         self.serial_conn = None
         return False
 
+    def serial_candidates(self, preferred_port='COM3'):
+        """COM ports worth probing, controller-like USB bridges first"""
+        try:
+            ports = list_ports.comports()
+        except Exception as e:
+            logger.warning(f"Could not list serial ports: {e}")
+            ports = []
+        if not ports:
+            return [preferred_port] + [f'COM{i}' for i in range(1, 11) if f'COM{i}' != preferred_port]
+
+        def rank(port):
+            is_controller = (port.vid, port.pid) in CONTROLLER_USB_IDS
+            return (not is_controller, port.device != preferred_port, port.device)
+
+        return [port.device for port in sorted(ports, key=rank)]
+
+    def probe_port(self, port):
+        """Return 'answered' if the controller replies on `port`, 'opened' if it only opens, else None"""
+        try:
+            conn = serial.Serial(port=port, baudrate=19200, timeout=0.05, write_timeout=0.2)
+        except Exception as e:
+            logger.debug(f"{port}: {e}")
+            return None
+        engine = SerialEngine(conn)
+        engine.start()
+        try:
+            engine.request(build_frame(TMCL_GAP, AP_ACTUAL_POSITION), timeout=0.3)
+            logger.info(f"Controller answered on {port}")
+            return 'answered'
+        except TableControllerError:
+            return 'opened'
+        finally:
+            engine.stop()
+            conn.close()
+
+    def open_serial(self, port):
+        """Open `port` as the controller connection"""
+        try:
+            logger.info(f"Attempting to connect to {port}...")
+            self.serial_conn = serial.Serial(
+                port=port,
+                baudrate=19200,
+                timeout=0.05,  # Reader thread poll interval, not a command timeout
+                write_timeout=self.ack_timeout
+            )
+            self.serial_engine = SerialEngine(self.serial_conn)
+            self.serial_engine.start()
+            # Test the connection by sending a stop command
+            if not self.send_command(self.COMMANDS["Stop"], "Stop"):
+                raise TableControllerError("Stop command was not accepted")
+            logger.info(f"✅ Serial connection established on {port}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Serial connection failed on {port}: {str(e)}")
+            self.close_serial()
+            return False
+
     def prepare_canon_camera(self):
         """Prepare Canon camera for automated capture - simplified version"""
         try:
@@ -106,7 +213,7 @@ class HardwareManager:
 
             for cmd in config_commands:
                 try:
-                    subprocess.run(['wsl', 'gphoto2'] + cmd, timeout=5, capture_output=True)
+                    subprocess.run(self.gphoto_command + cmd, timeout=5, capture_output=True)
                 except:
                     pass  # Ignore errors for configs that don't exist
 
@@ -119,7 +226,7 @@ class HardwareManager:
 
             for cmd in power_commands:
                 try:
-                    subprocess.run(['wsl', 'gphoto2'] + cmd, timeout=5, capture_output=True)
+                    subprocess.run(self.gphoto_command + cmd, timeout=5, capture_output=True)
                 except:
                     pass
 
@@ -135,11 +242,15 @@ class HardwareManager:
         # This will be handled by the main application's WSL setup
         return self.check_dslr_connection()
 
+    def wait_for_camera(self, timeout=15):
+        """Wait only as long as the camera actually needs to show up in gphoto2"""
+        return wait_for_camera(self.device_source, timeout=timeout)
+
     def check_dslr_connection(self):
         """Check DSLR connection using gPhoto2 in WSL"""
         try:
             result = subprocess.run(
-                ['wsl', 'gphoto2', '--auto-detect'],
+                self.gphoto_command + ['--auto-detect'],
                 capture_output=True, text=True, timeout=10
             )
             print(f"gPhoto2 auto-detect output: {result.stdout}")
@@ -148,14 +259,17 @@ class HardwareManager:
             print(f"❌ DSLR detection failed: {str(e)}")
             return False
 
-    def capture_sequence(self, num_photos=20, move_time=19):
+    def capture_sequence(self, num_photos=20, move_time=19, capture_mode=None):
         """Capture a sequence of photos with machine movement and progress updates"""
         self.pre_focus_camera()
         if not self.serial_conn:
             print("❌ Serial connection not established")
             return False
 
+        if capture_mode:
+            self.capture_mode = capture_mode
         self.send_command(self.COMMANDS["laser off"], "laser off")
+        self.open_camera_session()
 
         for i in range(1, num_photos + 1):
             print(f"▶ Obrót {i}/{num_photos}")
@@ -164,26 +278,31 @@ class HardwareManager:
             if self.progress_callback:
                 self.progress_callback(i, num_photos, "capturing")
 
-            # Send move command
-            self.send_command(self.COMMANDS["Lewo trzymanie"], "Lewo trzymanie")
-            time.sleep(move_time / num_photos)
-            self.send_command(self.COMMANDS["Stop"], "Stop")
+            # Move to the next stop
+            self.rotate_step(i, num_photos, move_time / num_photos)
 
             # Capture photo
             filename = f"zdjecie_{i:02d}.jpg"
-            success = self.capture_dslr_photo(filename=filename)
+            success = self.capture_frame(filename)
             if not success:
                 print(f"❌ Failed to capture photo {i}")
+                self.close_camera_session()
                 return False
 
+        if not self.finish_downloads(self.progress_callback):
+            print("❌ Some photos could not be downloaded")
+            self.close_camera_session()
+            return False
+
         print(f"✅ Completed capturing {num_photos} photos")
+        self.close_camera_session()
         self.send_command(self.COMMANDS["laser on"], "laser on")
 
         # Reset USB connection
         try:
-            subprocess.run(["powershell", "-Command", "usbipd detach --busid=2-1;"], timeout=5)
+            usb_inventory.run(['detach', '--busid=2-1'], timeout=5)
             time.sleep(1)
-            subprocess.run(["powershell", "-Command", "usbipd attach --wsl --busid=2-1"], timeout=5)
+            usb_inventory.run(['attach', '--wsl', '--busid=2-1'], timeout=5)
         except Exception as e:
             print(f"USB reset failed: {e}")
 
@@ -214,12 +333,19 @@ class HardwareManager:
             logger.warning("❌ No folder selected")
             return False
 
+    def camera_path(self, windows_path):
+        """Translate a local path to the form the gphoto2 command expects"""
+        if self.gphoto_command[0] == 'wsl':
+            return self.to_wsl_path(windows_path)
+        return windows_path
+
     def to_wsl_path(self, windows_path):
         """Convert Windows path to WSL path"""
         windows_path = os.path.normpath(windows_path)
         if windows_path.startswith('C:\\') or windows_path.startswith('C:/'):
             windows_path = windows_path[2:]
-        return f"/mnt/c/{windows_path.replace('\\', '/')}"
+        windows_path = windows_path.replace('\\', '/')
+        return f"/mnt/c/{windows_path}"
 
     def send_command(self, command, description=""):
         """Send serial command to the machine"""
@@ -228,77 +354,377 @@ class HardwareManager:
             return False
         try:
             logger.info(f"▶ {description}: {command.hex()}")
-            self.serial_conn.write(command)
+            if self.serial_engine is None:
+                self.serial_conn.write(command)
+            elif self.expect_acks:
+                self.serial_engine.request(command, timeout=self.ack_timeout)
+            else:
+                self.serial_engine.submit(command, expect_reply=False)
             return True
+        except TableControllerError as e:
+            if self.serial_engine.replies_seen == 0 and not self.serial_engine.error:
+                # Command went out but this controller never answers; stop waiting for acks
+                logger.warning(f"No acknowledgement from controller, continuing without acks: {e}")
+                self.expect_acks = False
+                return True
+            logger.error(f"❌ Command failed: {str(e)}")
+            return False
         except Exception as e:
             logger.error(f"❌ Command failed: {str(e)}")
             return False
 
-    def capture_dslr_photo(self, filename="photo.jpg"):
-        """Capture and save a DSLR photo with proper gPhoto2 syntax"""
-        # Ensure filename is unique
-        base_filename = os.path.splitext(filename)[0]
-        ext = os.path.splitext(filename)[1]
-        counter = 1
-        unique_filename = filename
-        while os.path.exists(os.path.join(self.save_folder, unique_filename)):
-            unique_filename = f"{base_filename}_{counter:03d}{ext}"
-            counter += 1
-
-        windows_path = os.path.join(self.save_folder, unique_filename)
-        wsl_dest_path = self.to_wsl_path(windows_path)
-
-        max_retries = 3
-        for attempt in range(max_retries):
+    def close_serial(self):
+        """Stop the serial I/O threads and close the port"""
+        if self.serial_engine:
+            self.serial_engine.stop()
+            self.serial_engine = None
+        if self.serial_conn:
+            self.serial_conn.close()
+            self.serial_conn = None
+        self.positioner = None
+        self.expect_acks = True
+
+    def open_staging(self):
+        """Start the staging area on first use; None when captures go straight to save_folder"""
+        if self.staging or not self.staging_dir:
+            return self.staging
+        try:
+            if self.gphoto_command[0] == 'wsl':
+                subprocess.run(['wsl', 'mkdir', '-p', self.staging_dir],
+                               check=True, capture_output=True, text=True, timeout=10)
+                # \\wsl.localhost\<distro>\... - how Windows reaches the same folder
+                result = subprocess.run(['wsl', 'wslpath', '-w', self.staging_dir],
+                                        check=True, capture_output=True, text=True, timeout=10)
+                local_dir = result.stdout.strip()
+            else:
+                os.makedirs(self.staging_dir, exist_ok=True)
+                local_dir = self.staging_dir
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"Staging unavailable, writing captures directly to {self.save_folder}: {e}")
+            self.staging_dir = None
+            return None
+        self.staging = StagingArea(self.staging_dir, local_dir, on_saved=self.frame_saved)
+        logger.info(f"Staging captures in {self.staging_dir}")
+        return self.staging
+
+    def capture_frame(self, filename):
+        """Capture one frame of a sequence according to capture_mode"""
+        if self.capture_mode == "pipelined":
+            return self.trigger_dslr_photo(filename=filename)
+        if self.capture_mode == "burst":
+            return self.burst_dslr_photo(filename=filename)
+        return self.capture_dslr_photo(filename=filename)
+
+    def filenames(self):
+        """Filename allocator for save_folder, scanning the folder on first use"""
+        if self.file_allocator is None or self.file_allocator.folder != self.save_folder:
+            os.makedirs(self.save_folder, exist_ok=True)
+            self.file_allocator = FilenameAllocator(self.save_folder)
+        return self.file_allocator
+
+    def unique_path(self, filename):
+        """Reserve a path in save_folder that no existing file uses"""
+        return self.filenames().allocate(filename)
+
+    def rotate_step(self, index, count, move_time=0.8):
+        """Turn the table to stop `index` of `count`, closed-loop when the controller answers"""
+        if self.positioning == "closed-loop" and self.serial_engine and self.expect_acks:
+            if self.positioner is None or self.positioner.engine is not self.serial_engine:
+                self.positioner = TablePositioner(self.serial_engine)
             try:
-                logger.info(f"📸 Capture attempt {attempt + 1}/{max_retries} for {filename}")
-
-                # Reset USB connection if this is a retry
-                if attempt > 0:
-                    self.reset_usb_connection()
-                    time.sleep(3)
-
-                # FIXED: Use proper gPhoto2 command syntax
-                # Method 1: Standard capture and download
-                result = subprocess.run(
-                    ['wsl', 'gphoto2', '--capture-image-and-download', f'--filename={wsl_dest_path}'],
-                    capture_output=True, text=True, timeout=25
-                )
+                logger.info(f"▶ Step {index}/{count} (closed-loop)")
+                self.positioner.rotate_step(index, count)
+                return True
+            except TableControllerError as e:
+                logger.warning(f"Closed-loop positioning unavailable, using timed rotation: {e}")
+                self.positioning = "timed"
 
-                if result.returncode == 0:
-                    logger.info(f"✅ Photo saved to {windows_path}")
-                    return True
+        if not self.send_command(self.COMMANDS["Lewo trzymanie"], "Lewo trzymanie"):
+            return False
+        time.sleep(move_time)
+        return self.send_command(self.COMMANDS["Stop"], "Stop")
+
+    def capture_dslr_photo(self, filename="photo.jpg"):
+        """Capture and save a DSLR photo, recovering from failures by error class"""
+        windows_path = self.unique_path(filename)
+        policy = self.retry_policy
+        history = []
+        camera_file = None
+
+        for attempt in range(policy.max_attempts):
+            try:
+                logger.info(f"📸 Capture attempt {attempt + 1}/{policy.max_attempts} for {filename}")
+                if camera_file:
+                    # The shot is on the camera already; only the transfer failed
+                    self.download_once(camera_file, windows_path)
                 else:
-                    logger.warning(f"Attempt {attempt + 1} failed: {result.stderr}")
-
-                    # Method 2: Alternative approach for Canon
-                    if "Device Busy" in result.stderr or "PTP" in result.stderr:
-                        logger.info("Trying alternative Canon capture method...")
-                        success = self.canon_alternative_capture(wsl_dest_path)
-                        if success:
-                            return True
-                        else:
-                            # Wait longer before retry for Canon
-                            time.sleep(4)
+                    self.capture_once(windows_path)
+                policy.record_result(history, success=True)
+                return True
+            except CaptureError as e:
+                history.append(e.error_class)
+                action = policy.next_action(e.error_class, history)
+                logger.warning(f"Attempt {attempt + 1} failed ({e.error_class}): {e}")
+                if attempt == policy.max_attempts - 1:
+                    break
+                logger.info(f"Recovering with {action}")
+                camera_file = e.camera_file if action in (REDOWNLOAD, REOPEN_SESSION) else None
+                self.recover(action)
+                time.sleep(policy.backoff(e.error_class))
+
+        policy.record_result(history, success=False)
+        self.filenames().release(windows_path)
+        logger.error(f"❌ All capture attempts failed for {filename}")
+        return False
 
-            except subprocess.TimeoutExpired:
-                logger.warning(f"Attempt {attempt + 1} timed out")
-                if attempt < max_retries - 1:
-                    time.sleep(3)
+    def capture_once(self, windows_path):
+        """One capture attempt; raises CaptureError describing what went wrong"""
+        # Persistent shell: no WSL/PTP startup cost per frame
+        with self.session_lock:
+            if self.session_wanted and self.ensure_camera_session():
+                try:
+                    camera_file = self.camera_session.capture_image()
+                except GPhotoSessionError as e:
+                    raise CaptureError(str(e))
+                self.download_once(camera_file, windows_path)
+                return
+
+        staging = self.open_staging()
+        if staging:
+            staged_name = os.path.basename(windows_path)
+            wsl_dest_path = staging.camera_path(staged_name)
+        else:
+            # Write under .incoming and rename when complete, so a cut-off transfer never takes the name
+            incoming_path = self.filenames().incoming_path(windows_path)
+            wsl_dest_path = self.camera_path(incoming_path)
+        try:
+            result = subprocess.run(
+                self.gphoto_command + ['--capture-image-and-download', f'--filename={wsl_dest_path}'],
+                capture_output=True, text=True, timeout=25
+            )
+        except subprocess.TimeoutExpired:
+            raise CaptureError("gphoto2 capture timed out")
+
+        if result.returncode == 0:
+            if staging:
+                staging.submit(staged_name, windows_path, self.filenames())
+            else:
+                self.commit_frame(incoming_path, windows_path)
+            return
+
+        # Alternative approach for Canon
+        if "Device Busy" in result.stderr or "PTP" in result.stderr:
+            logger.info("Trying alternative Canon capture method...")
+            if self.canon_alternative_capture(wsl_dest_path):
+                if staging:
+                    staging.submit(staged_name, windows_path, self.filenames())
+                else:
+                    self.commit_frame(incoming_path, windows_path)
+                return
+        raise CaptureError(result.stderr or f"gphoto2 exited with code {result.returncode}")
+
+    def download_once(self, camera_file, windows_path):
+        """Fetch `camera_file` through the shell into `windows_path`; raises CaptureError"""
+        with self.session_lock:
+            if not self.ensure_camera_session():
+                raise CaptureError("gPhoto2 session unavailable", camera_file=camera_file)
+            self.download_with_session(camera_file, windows_path)
+
+    def download_with_session(self, camera_file, windows_path):
+        """download_once with the shell open and session_lock held"""
+        staging = self.open_staging()
+        if staging:
+            try:
+                saved_name = self.camera_session.download(camera_file, staging.camera_dir)
+                # Cameras shooting to RAM reuse one name for every frame, and the shell
+                # overwrites it on the next get; give the file its own name first
+                staged_name = staging.claim(saved_name, os.path.basename(windows_path))
+            except (GPhotoSessionError, OSError) as e:
+                raise CaptureError(str(e), camera_file=camera_file)
+            # Moved to windows_path by the staging thread while capture goes on
+            staging.submit(staged_name, windows_path, self.filenames())
+            logger.info(f"📥 Staged {saved_name} as {staged_name} for {windows_path}")
+            return
+
+        incoming_dir = self.filenames().incoming_dir
+        try:
+            saved_name = self.camera_session.download(camera_file, self.camera_path(incoming_dir))
+            self.filenames().commit(os.path.join(incoming_dir, saved_name), windows_path)
+        except (GPhotoSessionError, OSError) as e:
+            raise CaptureError(str(e), camera_file=camera_file)
+        logger.info(f"✅ Photo saved to {windows_path}")
+        self.frame_saved(windows_path)
+
+    def commit_frame(self, incoming_path, windows_path):
+        """Move a fully written frame from .incoming to its reserved name"""
+        try:
+            self.filenames().commit(incoming_path, windows_path)
+        except OSError as e:
+            raise CaptureError(f"Could not move frame into place: {e}")
+        logger.info(f"✅ Photo saved to {windows_path}")
+        self.frame_saved(windows_path)
+
+    def frame_saved(self, windows_path):
+        """Hand a finished frame to frame_callback (e.g. image_pipeline.FrameStream.submit)"""
+        if self.frame_callback:
+            try:
+                self.frame_callback(windows_path)
             except Exception as e:
-                logger.error(f"Attempt {attempt + 1} error: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(3)
+                logger.error(f"Frame callback failed for {windows_path}: {e}")
+
+    def recover(self, action):
+        """Apply a recovery chosen by the retry policy"""
+        if action == REOPEN_SESSION:
+            self.drop_camera_session()
+        elif action == RESET_USB:
+            self.reset_usb_connection()
+        # RETRIGGER and REDOWNLOAD only need the back-off before the next attempt
+
+    def open_camera_session(self):
+        """Open a persistent gPhoto2 shell used by every capture until closed"""
+        with self.session_lock:
+            self.session_wanted = True
+            if self.camera_session and self.camera_session.is_alive():
+                return True
+            session = GPhotoSession(self.gphoto_command)
+            try:
+                session.open()
+            except (GPhotoSessionError, OSError) as e:
+                logger.warning(f"gPhoto2 session unavailable, using one-shot capture: {e}")
+                self.session_wanted = False
+                return False
+            self.camera_session = session
+            return True
 
-        logger.error(f"❌ All capture attempts failed for {filename}")
+    def drop_camera_session(self):
+        """Close the shell but reopen it on the next capture (e.g. around a USB reset)"""
+        with self.session_lock:
+            if self.camera_session:
+                self.camera_session.close()
+                self.camera_session = None
+
+    def close_camera_session(self):
+        """Close the persistent shell and go back to one-shot captures"""
+        self.finish_downloads()
+        self.drop_camera_session()
+        self.session_wanted = False
+        # Rescan the folder next session, files may have been added or removed meanwhile
+        if self.file_allocator:
+            self.file_allocator.close()
+        self.file_allocator = None
+        logger.info(f"Capture retry stats: {self.retry_policy.summary()}")
+
+    def ensure_camera_session(self):
+        """Make sure the persistent shell is running, reopening it if it was dropped"""
+        with self.session_lock:
+            if self.camera_session and self.camera_session.is_alive():
+                return True
+            return self.open_camera_session()
+
+    def trigger_dslr_photo(self, filename="photo.jpg"):
+        """Fire the shutter and queue the download, so the table can rotate meanwhile"""
+        if not self.session_wanted:
+            return self.capture_dslr_photo(filename=filename)
+        if self.downloader is None:
+            self.downloader = FrameDownloader(self)
+
+        try:
+            with self.session_lock:
+                camera_file = self.camera_session.capture_image() if self.ensure_camera_session() else None
+        except GPhotoSessionError as e:
+            logger.warning(f"Trigger failed for {filename}, falling back to blocking capture: {e}")
+            # Let queued frames finish before the retry path resets USB
+            self.downloader.wait()
+            return self.capture_dslr_photo(filename=filename)
+        if camera_file is None:
+            return self.capture_dslr_photo(filename=filename)
+
+        logger.info(f"📸 Triggered {filename} ({camera_file}), download queued")
+        self.downloader.submit(camera_file, self.unique_path(filename))
+        return True
+
+    def burst_dslr_photo(self, filename="photo.jpg"):
+        """Shoot a frame onto the memory card; it is downloaded by finish_downloads"""
+        if not self.session_wanted:
+            return self.capture_dslr_photo(filename=filename)
+
+        try:
+            with self.session_lock:
+                camera_file = None
+                if self.ensure_camera_session():
+                    if not self.burst_frames:
+                        # Files in camera RAM do not survive 20 frames, so write them to the card
+                        self.set_capture_target(1)
+                    camera_file = self.camera_session.capture_image()
+        except GPhotoSessionError as e:
+            logger.warning(f"Burst capture failed for {filename}, falling back to blocking capture: {e}")
+            return self.capture_dslr_photo(filename=filename)
+        if camera_file is None:
+            return self.capture_dslr_photo(filename=filename)
+
+        logger.info(f"📸 Shot {filename} to card ({camera_file})")
+        self.burst_frames.append((camera_file, self.unique_path(filename)))
+        return True
+
+    def set_capture_target(self, target):
+        """Select where the camera stores captures (0 = internal RAM, 1 = memory card)"""
+        for name in ('capturetarget', '/main/capturesettings/capturetarget'):
+            try:
+                self.camera_session.run(f'set-config {name}={target}', timeout=5)
+                return True
+            except GPhotoSessionError:
+                pass  # Config name differs between models
         return False
 
+    def download_frame(self, camera_file, windows_path):
+        """Download a frame left on the camera by trigger_dslr_photo"""
+        history = []
+        for attempt in range(2):
+            try:
+                self.download_once(camera_file, windows_path)
+                self.retry_policy.record_result(history, success=True)
+                return True
+            except CaptureError as e:
+                history.append(e.error_class)
+                self.retry_policy.next_action(e.error_class, history)
+                logger.warning(f"Download attempt {attempt + 1} failed for {camera_file}: {e}")
+                self.drop_camera_session()
+        self.retry_policy.record_result(history, success=False)
+        self.filenames().release(windows_path)
+        return False
+
+    def finish_downloads(self, progress_callback=None):
+        """Block until every queued frame is on disk; False if any download failed"""
+        if self.burst_frames:
+            # Single bulk transfer after rotation: frames go back to back over one session
+            frames, self.burst_frames = self.burst_frames, []
+            if self.downloader is None:
+                self.downloader = FrameDownloader(self)
+            self.downloader.progress_callback = progress_callback
+            logger.info(f"⬇ Downloading {len(frames)} frames from the card")
+            for camera_file, windows_path in frames:
+                self.downloader.submit(camera_file, windows_path)
+            self.downloader.wait()
+            with self.session_lock:
+                if self.camera_session and self.camera_session.is_alive():
+                    self.set_capture_target(0)
+        success = True
+        if self.downloader is not None:
+            downloader, self.downloader = self.downloader, None
+            success = downloader.wait()
+            downloader.stop()
+            for path in downloader.failed:
+                logger.error(f"❌ Download failed for {path}")
+        if self.staging:
+            success = self.staging.wait() and success
+        return success
+
     def canon_alternative_capture(self, wsl_path):
         """Alternative capture method specifically for Canon cameras"""
         try:
             # Method 1: Separate capture and download
             result1 = subprocess.run(
-                ['wsl', 'gphoto2', '--capture-image'],
+                self.gphoto_command + ['--capture-image'],
                 capture_output=True, text=True, timeout=15
             )
 
@@ -306,21 +732,21 @@ class HardwareManager:
                 time.sleep(2)  # Wait for camera to process
                 # Download the last image
                 result2 = subprocess.run(
-                    ['wsl', 'gphoto2', '--get-file=0', '--filename', wsl_path],
+                    self.gphoto_command + ['--get-file=0', '--filename', wsl_path],
                     capture_output=True, text=True, timeout=15
                 )
                 return result2.returncode == 0
 
             # Method 2: Use trigger capture for some Canon models
             result3 = subprocess.run(
-                ['wsl', 'gphoto2', '--trigger-capture'],
+                self.gphoto_command + ['--trigger-capture'],
                 capture_output=True, text=True, timeout=15
             )
 
             if result3.returncode == 0:
                 time.sleep(2)
                 result4 = subprocess.run(
-                    ['wsl', 'gphoto2', '--get-file=0', '--filename', wsl_path],
+                    self.gphoto_command + ['--get-file=0', '--filename', wsl_path],
                     capture_output=True, text=True, timeout=15
                 )
                 return result4.returncode == 0
@@ -331,31 +757,79 @@ class HardwareManager:
             logger.error(f"Canon alternative capture failed: {e}")
             return False
 
-    def reset_usb_connection(self, busid="2-1"):
+    def reset_usb_connection(self, busid=None):
         """Reset USB connection to clear device busy state"""
+        busid = busid or self.camera_busid or "2-1"
+        # The shell holds the PTP session open; it is reopened on the next capture
+        if self.downloader:
+            self.downloader.wait()
+        self.drop_camera_session()
         try:
-            # Detach from WSL
-            subprocess.run(["powershell", "-Command", f"usbipd detach --busid={busid}"],
-                           timeout=5, capture_output=True)
-            time.sleep(2)
-
-            # Reattach to WSL
-            subprocess.run(["powershell", "-Command", f"usbipd attach --wsl --busid={busid}"],
-                           timeout=10, capture_output=True)
-            time.sleep(3)  # Longer wait for Canon cameras to reinitialize
-            return True
+            # Detach from WSL and wait until usbipd has released it
+            usb_inventory.run(['detach', f'--busid={busid}'], timeout=5)
+            wait_for_usb_state(busid, attached=False, timeout=2)
+
+            # Reattach to WSL; return as soon as the camera re-enumerates
+            usb_inventory.run(['attach', '--wsl', f'--busid={busid}'], timeout=10)
+            return self.wait_for_camera(timeout=10)
         except Exception as e:
             logger.error(f"USB reset failed: {e}")
             return False
 
     def cleanup(self):
         """Clean up resources"""
+        self.close_camera_session()
+        if self.staging:
+            self.staging.stop()
+            self.staging = None
         if self.serial_conn:
             self.send_command(self.COMMANDS["Stop"], "Stop")
-            self.serial_conn.close()
+            self.close_serial()
             logger.info("Serial connection closed")
         tk.destroyAllWindows()
 
+class FrameDownloader:
+    """Background worker that pulls triggered frames off the camera while the table moves"""
+
+    def __init__(self, manager, progress_callback=None):
+        self.manager = manager
+        self.progress_callback = progress_callback
+        self.queue = queue.Queue()
+        self.failed = []
+        self.submitted = 0
+        self.done = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, camera_file, windows_path):
+        self.submitted += 1
+        self.queue.put((camera_file, windows_path))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                camera_file, windows_path = item
+                if not self.manager.download_frame(camera_file, windows_path):
+                    self.failed.append(windows_path)
+                self.done += 1
+                if self.progress_callback:
+                    self.progress_callback(self.done, self.submitted, "downloading")
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        """Wait for the queue to drain; True if nothing failed"""
+        self.queue.join()
+        return not self.failed
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+
 class App:
     def __init__(self, root):
         self.root = root
@@ -398,11 +872,9 @@ class App:
         """Test camera by capturing a single photo"""
         if self.hardware.capture_dslr_photo(filename="test.jpg"):
             # messagebox.showinfo("Success", "Test photo captured successfully")
-            cmd = "usbipd detach --busid=3-1;"
-            subprocess.run(["powershell", "-Command", cmd])
+            usb_inventory.run(['detach', '--busid=3-1'])
             time.sleep(1)
-            cmd = "usbipd attach --wsl --busid=3-1"
-            subprocess.run(["powershell", "-Command", cmd])
+            usb_inventory.run(['attach', '--wsl', '--busid=3-1'])
         else:
             messagebox.showerror("Error", "Failed to capture test photo")
 
@@ -0,0 +1,319 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote, urljoin
+
+from webp_handler import file_hash
+
+PANEL_BASE_URL = "https://defender.iai-shop.com/panel/"
+# Folder in the CMS file manager that holds one sub-folder per product
+UPLOAD_ROOT = "skaner-3d"
+
+# EXPERIMENTAL: the requests the panel's own pages send, with their form field names.
+# They are a best guess and have not been recorded from the live panel yet; only
+# panel_standin.py (built from this same table) answers them. Copy them from the
+# browser's network tab (cms-files.php) before setting uploader.UPLOAD_METHOD to
+# "http", and again whenever the panel changes.
+PANEL_ENDPOINTS = {
+    "login": {"method": "POST", "path": "signin.php",
+              "fields": {"username": "panel_login", "password": "panel_password"}},
+    # Page that only renders for a logged-in user; the marker is what the Selenium flow waits for
+    "check": {"method": "GET", "path": "cms-files.php", "marker": "name_span_1_302"},
+    "mkdir": {"method": "POST", "path": "cms-files.php?action=addDir",
+              "fields": {"parent": "dir", "name": "fg_dir_name"}},
+    "upload": {"method": "POST", "path": "cms-files.php?action=upload",
+               "fields": {"dir": "dir", "file": "file"}},
+    # JSON list of {"name": ..., "size": ...} for a directory
+    "list": {"method": "GET", "path": "cms-files.php?action=list", "fields": {"dir": "dir"}},
+}
+
+
+# Where the shop serves files of the CMS file manager (UPLOAD_ROOT/<product>/<file> below it)
+# Not yet confirmed against a real uploaded set; see uploader.VERIFY_UPLOADS
+PUBLIC_FILES_URL = "https://moto-tour.com.pl/data/include/cms/"
+VERIFY_WORKERS = 8
+
+# Per-product record of what has reached the panel, kept next to the WebP files
+JOURNAL_NAME = ".upload_journal.json"
+UPLOAD_WORKERS = 4
+# Logged-in panel cookies, so a restart does not need a fresh login
+COOKIES_PATH = os.path.join(os.path.expanduser("~"), ".360operator_cookies.json")
+
+
+class PanelError(Exception):
+    pass
+
+
+def load_cookies(key):
+    try:
+        with open(COOKIES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get(key, [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def save_cookies(key, cookies):
+    """Store a list of cookie dicts under `key`, keeping the other entries"""
+    try:
+        with open(COOKIES_PATH, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+    stored[key] = cookies
+    tmp_path = COOKIES_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, COOKIES_PATH)
+    except OSError as e:
+        print(f"Could not save cookies: {e}")
+
+
+class UploadJournal:
+    """Which files of a set are on the panel, so an interrupted upload only resends the rest"""
+
+    def __init__(self, folder, product_id):
+        self.path = os.path.join(folder, JOURNAL_NAME)
+        self.product_id = product_id
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        # A journal for another product (folder reused) says nothing about this one
+        self.files = data.get("files", {}) if data.get("product_id") == product_id else {}
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_uploaded(self, path):
+        entry = self.files.get(os.path.basename(path))
+        return bool(entry) and {key: entry.get(key) for key in ("size", "mtime")} == self.signature(path)
+
+    def mark(self, path, uploaded=True):
+        with self.lock:
+            if uploaded:
+                self.files[os.path.basename(path)] = self.signature(path)
+            else:
+                self.files.pop(os.path.basename(path), None)
+            self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"product_id": self.product_id, "files": self.files}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save upload journal: {e}")
+
+
+def check_public_file(session, url, path, check_hash=False, timeout=10):
+    """None if `url` serves the same file as `path`, otherwise what is wrong with it"""
+    try:
+        if not check_hash:
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code == 404:
+                return "missing"
+            length = response.headers.get("Content-Length")
+            if response.status_code < 400 and length is not None:
+                size = os.path.getsize(path)
+                return None if int(length) == size else f"size {length} instead of {size}"
+        # No usable HEAD answer (or a hash is wanted): fetch the file itself
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        return f"request failed: {e}"
+    if response.status_code == 404:
+        return "missing"
+    if response.status_code >= 400:
+        return f"HTTP {response.status_code}"
+    if len(response.content) != os.path.getsize(path):
+        return f"size {len(response.content)} instead of {os.path.getsize(path)}"
+    if check_hash and hashlib.sha1(response.content).hexdigest() != file_hash(path):
+        return "content differs"
+    return None
+
+
+def verify_public_files(directory, files, base_url=PUBLIC_FILES_URL, check_hash=False, workers=VERIFY_WORKERS):
+    """Check concurrently that the shop serves every uploaded file; {file name: problem} for the bad ones.
+
+    Uses HEAD and the Content-Length by default, GET with a SHA-1
+    comparison when `check_hash` is set.
+    """
+    problems = {}
+    with requests.Session() as session:
+        session.mount("https://", HTTPAdapter(pool_maxsize=workers))
+        session.mount("http://", HTTPAdapter(pool_maxsize=workers))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for path in files:
+                url = urljoin(base_url, quote(f"{directory}/{os.path.basename(path)}"))
+                futures[pool.submit(check_public_file, session, url, path, check_hash)] = os.path.basename(path)
+            for future in as_completed(futures):
+                problem = future.result()
+                if problem:
+                    problems[futures[future]] = problem
+    return problems
+
+
+class PanelClient:
+    """Talks to the shop panel over HTTP with one logged-in requests.Session.
+
+    The session's connection pool is shared by every request, so uploads reuse
+    warm TLS connections; an expired login is renewed once per failing request.
+    Experimental: it speaks PANEL_ENDPOINTS, which is not yet confirmed against
+    the live panel, so the browser flow stays the default upload method.
+    """
+
+    def __init__(self, username, password, base_url=PANEL_BASE_URL, endpoints=None, pool_size=8, timeout=60):
+        self.username = username
+        self.password = password
+        self.base_url = base_url
+        self.endpoints = endpoints or PANEL_ENDPOINTS
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.logged_in = False
+        self.login_lock = threading.Lock()
+        for cookie in load_cookies("panel_http"):
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                     path=cookie.get("path", "/"))
+
+    def url(self, name):
+        return urljoin(self.base_url, self.endpoints[name]["path"])
+
+    def field(self, name, key):
+        return self.endpoints[name]["fields"][key]
+
+    def send(self, name, data=None, files=None, params=None):
+        endpoint = self.endpoints[name]
+        try:
+            return self.session.request(endpoint["method"], self.url(name), data=data, files=files,
+                                        params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise PanelError(f"{name} request failed: {e}")
+
+    def session_expired(self, response):
+        """The panel answers expired sessions with 401/403 or a redirect to the login page"""
+        return (response.status_code in (401, 403) or
+                urljoin(self.base_url, self.endpoints["login"]["path"]) in response.url)
+
+    def request(self, name, data=None, files=None, params=None):
+        """Send a panel request, logging in again once if the session has expired"""
+        if not self.logged_in:
+            self.ensure_login()
+        response = self.send(name, data, files, params)
+        if self.session_expired(response):
+            self.relogin()
+            if files:
+                for _, (_, handle) in files.items():
+                    handle.seek(0)
+            response = self.send(name, data, files, params)
+        if response.status_code >= 400 or self.session_expired(response):
+            raise PanelError(f"{name} failed: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def ensure_login(self):
+        """Reuse the stored cookies if they are still valid, otherwise log in"""
+        with self.login_lock:
+            if self.logged_in:
+                return
+            if self.session.cookies and self.check_login():
+                self.logged_in = True
+                return
+            self.login()
+
+    def relogin(self):
+        """Log in again after an expired response, once for all threads that saw it"""
+        stale_cookies = self.session.cookies.get_dict()
+        with self.login_lock:
+            if self.session.cookies.get_dict() == stale_cookies:
+                self.login()
+
+    def login(self):
+        self.logged_in = False
+        data = {self.field("login", "username"): self.username, self.field("login", "password"): self.password}
+        self.send("login", data=data)
+        if not self.check_login():
+            raise PanelError("Login failed")
+        self.logged_in = True
+        save_cookies("panel_http", [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+                                    for c in self.session.cookies])
+
+    def check_login(self):
+        response = self.send("check")
+        return response.status_code == 200 and self.endpoints["check"]["marker"] in response.text
+
+    def create_directory(self, name, parent=UPLOAD_ROOT):
+        """Create parent/name; an existing directory is fine"""
+        self.request("mkdir", data={self.field("mkdir", "parent"): parent, self.field("mkdir", "name"): name})
+        return f"{parent}/{name}"
+
+    def upload_file(self, directory, path):
+        with open(path, "rb") as f:
+            self.request("upload", data={self.field("upload", "dir"): directory},
+                         files={self.field("upload", "file"): (os.path.basename(path), f)})
+
+    def list_directory(self, directory):
+        """{file name: size in bytes} of a panel directory"""
+        response = self.request("list", params={self.field("list", "dir"): directory})
+        try:
+            return {entry["name"]: int(entry.get("size", -1)) for entry in response.json()}
+        except (ValueError, KeyError, TypeError) as e:
+            raise PanelError(f"Unexpected directory listing: {e}")
+
+    def upload_set(self, product_id, files, workers=UPLOAD_WORKERS, journal=None):
+        """Upload `files` into the product's directory on `workers` parallel connections.
+
+        Files the journal already records as uploaded are skipped. Success is
+        only reported once the directory listing shows every file with its
+        local size; otherwise PanelError names the missing ones.
+        """
+        directory = self.create_directory(product_id)
+        pending = [path for path in files if not (journal and journal.is_uploaded(path))]
+        if len(pending) < len(files):
+            print(f"Resuming: {len(files) - len(pending)} of {len(files)} files already uploaded")
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as pool:
+            futures = {pool.submit(self.upload_file, directory, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                    if journal:
+                        journal.mark(path)
+                    print(f"✓ {os.path.basename(path)}")
+                except PanelError as e:
+                    failed.append(os.path.basename(path))
+                    print(f"[X] {os.path.basename(path)}: {e}")
+        if failed:
+            raise PanelError(f"Upload failed for {', '.join(sorted(failed))}")
+
+        missing = self.missing_files(directory, files)
+        if missing:
+            if journal:
+                for path in files:
+                    if os.path.basename(path) in missing:
+                        journal.mark(path, uploaded=False)
+            raise PanelError(f"Not on the server after upload: {', '.join(sorted(missing))}")
+        return directory
+
+    def missing_files(self, directory, files):
+        """Names of `files` absent from the panel directory or with a different size there"""
+        listing = self.list_directory(directory)
+        return [os.path.basename(path) for path in files
+                if listing.get(os.path.basename(path)) != os.path.getsize(path)]
+
+    def close(self):
+        self.session.close()
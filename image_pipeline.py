@@ -0,0 +1,325 @@
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+from PIL import Image
+
+from webp_handler import DEFAULT_PROFILE, FRAMES_PER_SET, default_workers, print_progress, save_webp
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+OUTPUT_FOLDER = "PNG Files"
+WEBP_FOLDER = "WEBP Files"
+# Folders the pipeline writes or uses internally; never treated as capture sets
+SKIP_FOLDERS = {OUTPUT_FOLDER, WEBP_FOLDER, ".incoming"}
+
+# What the Photoshop "Otwarty" action did, as tunable numbers
+PROCESSING_SETTINGS = {
+    # Pixels with every channel above this count as the white backdrop
+    "background_threshold": 235,
+    # Backdrop pixels within this many levels below the threshold are blended towards white
+    "background_softness": 20,
+    # Extra space around the object's bounding box, as a fraction of the box size
+    "crop_margin": 0.06,
+    # Square output so the 360 viewer does not letterbox
+    "square": True,
+    # Levels: input black/white points and midtone gamma
+    "black_point": 8,
+    "white_point": 245,
+    "gamma": 1.05,
+    # Longest edge of the output in px; None keeps the cropped size
+    "max_size": 2000,
+    # FrameStream crops from the first frame before the others exist; this much extra
+    # margin leaves room for the product turning wider
+    "stream_margin": 0.15,
+}
+
+
+def levels_lut(black_point, white_point, gamma):
+    """256-entry lookup table for a Levels adjustment"""
+    values = np.arange(256, dtype=np.float32)
+    scaled = np.clip((values - black_point) / max(white_point - black_point, 1), 0.0, 1.0)
+    return np.round(255 * scaled ** (1.0 / gamma)).astype(np.uint8)
+
+
+def foreground_mask(pixels, threshold):
+    """True where a pixel is darker than the backdrop in at least one channel"""
+    return pixels.min(axis=2) <= threshold
+
+
+def object_box(img, threshold, sample_size=400):
+    """Bounding box (left, top, right, bottom) of the non-backdrop area, in `img` pixels"""
+    sample = img.copy()
+    sample.thumbnail((sample_size, sample_size))
+    mask = foreground_mask(np.asarray(sample.convert("RGB")), threshold)
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if not rows.size:
+        return None
+    scale_x = img.width / sample.width
+    scale_y = img.height / sample.height
+    return (int(cols[0] * scale_x), int(rows[0] * scale_y),
+            int(np.ceil((cols[-1] + 1) * scale_x)), int(np.ceil((rows[-1] + 1) * scale_y)))
+
+
+def frame_box(input_path, settings=PROCESSING_SETTINGS):
+    """Object box of one capture, from a reduced decode; runs in a worker process"""
+    with Image.open(input_path) as img:
+        size = img.size
+        # JPEG decodes at 1/8 scale almost for free
+        img.draft("RGB", (img.width // 8, img.height // 8))
+        box = object_box(img, settings["background_threshold"])
+        if box is None:
+            return None, size
+        scale_x = size[0] / img.width
+        scale_y = size[1] / img.height
+        return (int(box[0] * scale_x), int(box[1] * scale_y),
+                int(box[2] * scale_x), int(box[3] * scale_y)), size
+
+
+def set_crop_box(boxes, image_size, settings=PROCESSING_SETTINGS):
+    """One crop for the whole set, so the product does not jump between frames"""
+    boxes = [box for box in boxes if box]
+    if not boxes:
+        return (0, 0) + tuple(image_size)
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    right = max(box[2] for box in boxes)
+    bottom = max(box[3] for box in boxes)
+    margin = int(max(right - left, bottom - top) * settings["crop_margin"])
+    left, top, right, bottom = left - margin, top - margin, right + margin, bottom + margin
+    if settings["square"]:
+        side = max(right - left, bottom - top)
+        center_x, center_y = (left + right) // 2, (top + bottom) // 2
+        left, top = center_x - side // 2, center_y - side // 2
+        right, bottom = left + side, top + side
+    # May reach past the photo; crop_padded fills that with backdrop white
+    return left, top, right, bottom
+
+
+def box_inside(box, outer):
+    return box[0] >= outer[0] and box[1] >= outer[1] and box[2] <= outer[2] and box[3] <= outer[3]
+
+
+def crop_padded(img, box):
+    """Crop to `box`, filling any part outside the image with white"""
+    canvas = Image.new("RGB", (box[2] - box[0], box[3] - box[1]), (255, 255, 255))
+    inner = (max(box[0], 0), max(box[1], 0), min(box[2], img.width), min(box[3], img.height))
+    canvas.paste(img.crop(inner), (inner[0] - box[0], inner[1] - box[1]))
+    return canvas
+
+
+def clean_background(pixels, threshold, softness):
+    """Push near-white backdrop to pure white, with a soft edge around the object"""
+    # Blend weight (0-256) per darkest-channel value, looked up instead of computed per pixel
+    levels = np.arange(256, dtype=np.float32)
+    weights = np.round(256 * np.clip((levels - (threshold - softness)) / max(softness, 1), 0.0, 1.0))
+    weight = weights.astype(np.uint16)[pixels.min(axis=2)][..., None]
+    lift = ((255 - pixels).astype(np.uint16) * weight) >> 8
+    return pixels + lift.astype(np.uint8)
+
+
+def process_image(img, crop_box, settings=PROCESSING_SETTINGS):
+    """Crop, levels, backdrop cleanup and resize of one frame; returns an RGB image"""
+    img = img.convert("RGB")
+    if crop_box:
+        img = crop_padded(img, crop_box)
+    max_size = settings["max_size"]
+    if max_size and max(img.size) > max_size:
+        # Resize first so the per-pixel work runs on the smaller image
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+    lut = levels_lut(settings["black_point"], settings["white_point"], settings["gamma"])
+    pixels = np.asarray(img.point(lut.tolist() * 3))
+    pixels = clean_background(pixels, settings["background_threshold"], settings["background_softness"])
+    return Image.fromarray(pixels, "RGB")
+
+
+def process_frame(input_path, crop_box, settings=PROCESSING_SETTINGS, png_path=None, webp_path=None,
+                  webp_profile=DEFAULT_PROFILE):
+    """Process one capture and save it as PNG and/or WebP; runs in a worker process.
+
+    The processed frame stays in memory between the two encoders, so the
+    WebP does not need a PNG on disk to be made from.
+    """
+    with Image.open(input_path) as img:
+        max_size = settings["max_size"]
+        if crop_box and max_size:
+            # Let the JPEG decoder scale down when the output is much smaller than the crop
+            reduce = max(crop_box[2] - crop_box[0], crop_box[3] - crop_box[1]) / max_size
+            if reduce >= 2:
+                full_width = img.width
+                img.draft("RGB", (int(img.width / reduce), int(img.height / reduce)))
+                scale = img.width / full_width
+                crop_box = tuple(int(round(value * scale)) for value in crop_box)
+        processed = process_image(img, crop_box, settings)
+    if webp_path:
+        save_webp(processed, webp_path, webp_profile)
+    if png_path:
+        processed.save(png_path, "PNG")
+    return webp_path or png_path
+
+
+def find_capture_sets(root_folder):
+    """(folder, [image paths]) for every folder under root_folder holding captures"""
+    sets = []
+    for dirpath, dirnames, filenames in os.walk(root_folder):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_FOLDERS]
+        images = sorted(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS))
+        if images:
+            sets.append((dirpath, images))
+    return sets
+
+
+def process_folder(root_folder, workers=None, progress_callback=print_progress, settings=PROCESSING_SETTINGS,
+                   webp_profile=None, keep_png=True):
+    """Process every capture set under root_folder into its "PNG Files" folder.
+
+    Same layout as auto_process.jsx: each folder with images gets a sibling
+    "PNG Files" folder with one PNG per capture. With `webp_profile`, full
+    sets are also encoded straight to "WEBP Files/img_0_0_{i}.webp" from
+    memory, and the PNGs are only written if `keep_png`. Returns the number
+    of frames written; raises RuntimeError if any frame failed.
+    """
+    sets = find_capture_sets(root_folder)
+    if webp_profile:
+        for folder, images in sets:
+            if len(images) != FRAMES_PER_SET:
+                progress_callback(0, 0, f"[!] Pomijam: {folder} — znaleziono {len(images)} plików, nie {FRAMES_PER_SET}.")
+        sets = [(folder, images) for folder, images in sets if len(images) == FRAMES_PER_SET]
+    total = sum(len(images) for _, images in sets)
+    done = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=min(workers or default_workers(), max(total, 1))) as pool:
+        for folder, images in sets:
+            png_folder = os.path.join(folder, OUTPUT_FOLDER) if keep_png or not webp_profile else None
+            webp_folder = os.path.join(folder, WEBP_FOLDER) if webp_profile else None
+            for output_folder in (png_folder, webp_folder):
+                if output_folder:
+                    os.makedirs(output_folder, exist_ok=True)
+
+            box_results = list(pool.map(frame_box, images, [settings] * len(images)))
+            crop_box = set_crop_box([box for box, _ in box_results], box_results[0][1], settings)
+
+            futures = {}
+            for i, input_path in enumerate(images):
+                name = os.path.splitext(os.path.basename(input_path))[0] + ".png"
+                png_path = os.path.join(png_folder, name) if png_folder else None
+                webp_path = os.path.join(webp_folder, f"img_0_0_{i}.webp") if webp_folder else None
+                futures[pool.submit(process_frame, input_path, crop_box, settings, png_path, webp_path,
+                                    webp_profile)] = input_path
+            for future in as_completed(futures):
+                done += 1
+                try:
+                    output_path = future.result()
+                    progress_callback(done, total, f"✓ {os.path.basename(output_path)}")
+                except Exception as e:
+                    failed.append(futures[future])
+                    progress_callback(done, total, f"[X] Błąd przy {os.path.basename(futures[future])}: {e}")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {total} frames failed to process")
+    return done
+
+
+class FrameStream:
+    """Processes the frames of one set while the rest of it is still being captured.
+
+    submit() is fed each capture as soon as it is on disk. The crop comes from
+    the first frame plus stream_margin; if a later frame does not fit it,
+    finish() reprocesses the set with the crop process_folder would use.
+    """
+
+    def __init__(self, folder, webp_profile=DEFAULT_PROFILE, keep_png=False, settings=PROCESSING_SETTINGS,
+                 workers=None, progress_callback=print_progress):
+        self.folder = folder
+        self.webp_profile = webp_profile
+        self.settings = settings
+        self.progress_callback = progress_callback
+        self.png_folder = os.path.join(folder, OUTPUT_FOLDER) if keep_png else None
+        self.webp_folder = os.path.join(folder, WEBP_FOLDER)
+        # Frames are encoded under their capture name and numbered once the set is complete
+        self.pending_folder = os.path.join(self.webp_folder, ".stream")
+        for output_folder in (self.png_folder, self.pending_folder):
+            if output_folder:
+                os.makedirs(output_folder, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=workers or default_workers())
+        self.queue = queue.Queue()
+        self.frames = {}
+        self.boxes = []
+        self.image_size = None
+        self.crop_box = None
+        self.crop_fits = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, input_path):
+        """Queue a capture that has just been saved"""
+        self.queue.put(input_path)
+
+    def _run(self):
+        while True:
+            input_path = self.queue.get()
+            if input_path is None:
+                return
+            try:
+                box, self.image_size = frame_box(input_path, self.settings)
+            except Exception as e:
+                self.progress_callback(0, 0, f"[X] Błąd przy {os.path.basename(input_path)}: {e}")
+                self.frames[input_path] = None
+                continue
+            self.boxes.append(box)
+            if self.crop_box is None and box:
+                settings = dict(self.settings, crop_margin=self.settings["crop_margin"] + self.settings["stream_margin"])
+                self.crop_box = set_crop_box([box], self.image_size, settings)
+            if box and self.crop_box and not box_inside(box, self.crop_box):
+                self.crop_fits = False
+            self.frames[input_path] = self._process(input_path, self.crop_box)
+            self.progress_callback(len(self.frames), FRAMES_PER_SET, f"⚙ {os.path.basename(input_path)}")
+
+    def _process(self, input_path, crop_box):
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        png_path = os.path.join(self.png_folder, name + ".png") if self.png_folder else None
+        webp_path = os.path.join(self.pending_folder, name + ".webp")
+        return self.pool.submit(process_frame, input_path, crop_box, self.settings, png_path, webp_path,
+                                self.webp_profile)
+
+    def finish(self):
+        """Wait for the set and number its WebPs; returns the frame count, raises RuntimeError on failure"""
+        self.queue.put(None)
+        self.thread.join()
+        try:
+            if len(self.frames) != FRAMES_PER_SET:
+                raise RuntimeError(f"{len(self.frames)} frames streamed, expected {FRAMES_PER_SET}")
+            if not self.crop_fits:
+                self.progress_callback(0, 0, "Kadr z pierwszej klatki za mały, przetwarzam zestaw ponownie")
+                wait([future for future in self.frames.values() if future])
+                crop_box = set_crop_box(self.boxes, self.image_size, self.settings)
+                self.frames = {path: self._process(path, crop_box) for path in self.frames}
+            failed = []
+            for input_path, future in self.frames.items():
+                try:
+                    if future is None:
+                        raise RuntimeError("not readable")
+                    future.result()
+                except Exception as e:
+                    failed.append(input_path)
+                    self.progress_callback(0, 0, f"[X] Błąd przy {os.path.basename(input_path)}: {e}")
+            if failed:
+                raise RuntimeError(f"{len(failed)} of {len(self.frames)} frames failed to process")
+
+            for i, input_path in enumerate(sorted(self.frames)):
+                name = os.path.splitext(os.path.basename(input_path))[0]
+                os.replace(os.path.join(self.pending_folder, name + ".webp"),
+                           os.path.join(self.webp_folder, f"img_0_0_{i}.webp"))
+            shutil.rmtree(self.pending_folder, ignore_errors=True)
+            return len(self.frames)
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    def cancel(self):
+        """Stop without producing a set, e.g. when the capture failed"""
+        self.queue.put(None)
+        self.thread.join()
+        self.pool.shutdown(cancel_futures=True)
+        shutil.rmtree(self.pending_folder, ignore_errors=True)
@@ -5,6 +5,8 @@ import time
 import subprocess
 import pygetwindow as gw
 
+from screen_matcher import TemplateMatcher
+
 script_dir = os.path.dirname(os.path.abspath(__file__))
 # open = os.path.join(script_dir, 'photos', 'open.jpg')
 # path = os.path.join(script_dir, 'photos', 'path.jpg')
@@ -68,6 +70,9 @@ setup_obs = [
     os.path.join(image_folder, "minimalize.jpg")
 ]
 
+# Keeps the templates and where they were last seen between clicks
+matcher = TemplateMatcher()
+
 
 def find_and_click(selected):
     try:
@@ -124,6 +129,7 @@ def click_second():
 
 def setup():
 
+    matcher.preload(setup_o2vr + setup_obs)
     subprocess.Popen('C:\Program Files\Object2VR\object2vr.exe')
     img = os.path.join(image_folder, "setup_start.jpg")
     wait_until_image_appears(img)
@@ -149,20 +155,14 @@ def setup():
 
 
 def wait_until_image_appears(image_path, timeout=30, interval=0.5, action=None, confidence=0.9):
+    """Box where the image was found, or False after `timeout` seconds"""
     print(f"Waiting for image to appear: {image_path}")
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        try:
-            location = pyautogui.locateOnScreen(image_path, confidence=confidence)
-            if location is not None:
-                print("✅ Image found!")
-                if action:
-                    action()
-                return True
-        except Exception as e:
-            print(f"No image yet")
-        time.sleep(interval)
+    _, location = matcher.wait_for(image_path, timeout=timeout, interval=interval, confidence=confidence)
+    if location is not None:
+        print("✅ Image found!")
+        if action:
+            action()
+        return location
 
     print("⏰ Timeout: Image not found.")
     return False
@@ -170,12 +170,12 @@ def wait_until_image_appears(image_path, timeout=30, interval=0.5, action=None,
 def click_images(image_list):
     for image in image_list:
         if image == os.path.join(image_folder, "obs_wtf.jpg"):
-            wait_until_image_appears(image,timeout=4 ,confidence=0.75)
+            location = wait_until_image_appears(image,timeout=4 ,confidence=0.75)
         else:
-            wait_until_image_appears(image, confidence=0.75)
+            location = wait_until_image_appears(image, confidence=0.75)
         try:
-            location = pyautogui.locateCenterOnScreen(image, confidence=0.75)
             if location:
+                location = pyautogui.center(location)
                 pyautogui.moveTo(location)
                 if "right_click" in image:
                     pyautogui.rightClick(location)
@@ -188,5 +188,3 @@ def click_images(image_list):
 
         except Exception as e:
             print(f"Error processing {image}: {e}")
-
-
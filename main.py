@@ -6,17 +6,23 @@ import os
 import csv
 import time
 import threading
-import re
+import multiprocessing
 from os import mkdir
 
 from pymsgbox import alert
 
 from hardware_handler import HardwareManager, logger
-from webp_handler import process_all
-from uploader import upload_files
+from webp_handler import process_all, DEFAULT_PROFILE
+from image_pipeline import process_folder, FrameStream
+from batch_queue import BatchPipeline, BatchJob, DONE, FAILED, parse_product_ids, read_product_ids
+from uploader import upload_files, update_products
+from usb_inventory import usb_inventory
+from device_monitor import wait_for_usb_state
+from capture_files import DEFAULT_STAGING_DIR
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QFileDialog, QTextEdit, QVBoxLayout, QWidget,
-                             QHBoxLayout, QLabel, QGridLayout, QTreeView, QMessageBox, QLineEdit, QSizePolicy, QFrame)
+                             QHBoxLayout, QLabel, QGridLayout, QTreeView, QMessageBox, QLineEdit, QSizePolicy, QFrame,
+                             QInputDialog)
 from PyQt6.QtGui import QColor, QFileSystemModel
 from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
 
@@ -35,6 +41,26 @@ class FileDialogExample(QMainWindow):
 
         # Initialize hardware manager
         self.hardware_manager = None
+        # "pipelined" downloads each frame while the table rotates to the next one,
+        # "burst" shoots all frames to the card and downloads them after rotation
+        self.capture_mode = "pipelined"
+        # Frames land on the WSL file system first and are moved to the Windows folder in the background
+        self.staging_dir = DEFAULT_STAGING_DIR
+        # webp_handler.ENCODING_PROFILES name; "max" keeps the original quality=100 output
+        self.webp_profile = DEFAULT_PROFILE
+        # "photoshop" runs auto_process.jsx; "native" processes frames with image_pipeline.
+        # Switch to "native" only once its output has been compared against the Photoshop action
+        self.processing_engine = "photoshop"
+        # Native engine only: encode WebP straight from memory; PNGs are written only to archive them
+        self.direct_webp = True
+        self.keep_png = False
+        # Native direct-WebP only: process each frame as soon as it is captured
+        self.stream_processing = True
+        self.frame_stream = None
+        # Batch mode workers per stage; capture is always one (a single turntable)
+        self.batch_process_workers = 1
+        self.batch_upload_workers = 2
+        self.batch_thread = None
         self.capture_in_progress = False
         self.camera_busid = None  # Store detected camera bus ID
 
@@ -199,10 +225,7 @@ class FileDialogExample(QMainWindow):
         """Bind USB device for sharing with WSL (requires admin privileges)"""
         try:
             # Try to bind the USB device
-            result = subprocess.run(
-                ["powershell", "-Command", f"usbipd bind --busid={busid}"],
-                capture_output=True, text=True, timeout=10
-            )
+            result = usb_inventory.run(['bind', f'--busid={busid}'], timeout=10)
 
             if result.returncode == 0:
                 print(f"USB device {busid} bound successfully")
@@ -251,6 +274,7 @@ class FileDialogExample(QMainWindow):
                 os.remove(script_path)
             except:
                 pass
+            usb_inventory.invalidate()
 
             if result.returncode == 0:
                 print(f"USB device {busid} bound with admin privileges")
@@ -265,44 +289,18 @@ class FileDialogExample(QMainWindow):
 
     def detect_camera_busid(self):
         """Detect the camera's USB bus ID using usbipd"""
-        try:
-            # List all USB devices
-            result = subprocess.run(
-                ["powershell", "-Command", "usbipd list"],
-                capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode != 0:
-                print("Failed to list USB devices")
-                return None
-
-            # Parse the output to find camera devices
-            lines = result.stdout.split('\n')
-            camera_busid = None
-
-            # Look for common camera vendors or PTP devices
-            camera_keywords = ['canon', 'nikon', 'sony', 'fuji', 'olympus', 'panasonic',
-                               'ptp', 'picture transfer', 'camera', 'dslr']
-
-            for line in lines:
-                if re.match(r'^\d+-\d+\s+', line):  # Line with bus ID
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        busid = parts[0]
-                        description = ' '.join(parts[2:]).lower()
-
-                        # Check if this looks like a camera
-                        if any(keyword in description for keyword in camera_keywords):
-                            print(f"Found potential camera: {description} at {busid}")
-                            camera_busid = busid
-                            break
-
-            return camera_busid
-
-        except Exception as e:
-            print(f"USB detection error: {e}")
+        devices = usb_inventory.devices()
+        if devices is None:
+            print("Failed to list USB devices")
             return None
 
+        # Look for common camera vendors or PTP devices
+        camera = usb_inventory.find_camera()
+        if camera:
+            print(f"Found potential camera: {camera.description} at {camera.busid}")
+            return camera.busid
+        return None
+
     def attach_usb_to_wsl(self, busid=None):
         """Attach USB device to WSL with automatic binding"""
         if busid is None:
@@ -320,22 +318,14 @@ class FileDialogExample(QMainWindow):
                 # If automatic binding fails, show user instructions
                 self.show_bind_instructions(busid)
                 return False
-            # Wait a moment after binding
-            time.sleep(2)
 
         try:
             # Detach first if already attached
-            subprocess.run(
-                ["powershell", "-Command", f"usbipd detach --busid={busid}"],
-                capture_output=True, timeout=5
-            )
-            time.sleep(1)
+            usb_inventory.run(['detach', f'--busid={busid}'], timeout=5)
+            wait_for_usb_state(busid, attached=False, timeout=2)
 
             # Attach to WSL
-            result = subprocess.run(
-                ["powershell", "-Command", f"usbipd attach --wsl --busid={busid}"],
-                capture_output=True, text=True, timeout=10
-            )
+            result = usb_inventory.run(['attach', '--wsl', f'--busid={busid}'], timeout=10)
 
             if result.returncode == 0:
                 print(f"USB device {busid} attached to WSL")
@@ -351,25 +341,13 @@ class FileDialogExample(QMainWindow):
 
     def get_usb_device_state(self, busid):
         """Check if USB device is shared"""
-        try:
-            result = subprocess.run(
-                ["powershell", "-Command", "usbipd list"],
-                capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode == 0:
-                # Parse the output to find the device state
-                for line in result.stdout.split('\n'):
-                    if busid in line:
-                        if "not shared" in line.lower():
-                            return "not shared"
-                        elif "shared" in line.lower():
-                            return "shared"
-                return "not found"
-            return "error"
-        except Exception as e:
-            print(f"Error checking USB state: {e}")
+        devices = usb_inventory.devices()
+        if devices is None:
             return "error"
+        device = usb_inventory.find(busid)
+        if device is None:
+            return "not found"
+        return "shared" if device.shared else "not shared"
 
     def show_bind_instructions(self, busid):
         """Show instructions for manual USB binding"""
@@ -447,8 +425,19 @@ class FileDialogExample(QMainWindow):
         font.setBold(True)
         self.start_button.setFont(font)
 
+        # Several products in a row: capture, processing and upload overlap
+        self.batch_button = QPushButton("Batch...")
+        self.batch_button.setEnabled(False)
+        self.batch_button.clicked.connect(self.start_batch)
+
+        # 360 parameter for already uploaded products, no capture involved
+        self.parameters_button = QPushButton("Parameters...")
+        self.parameters_button.clicked.connect(self.start_parameter_update)
+
         name_row.addWidget(self.name_input)
         name_row.addWidget(self.start_button)
+        name_row.addWidget(self.batch_button)
+        name_row.addWidget(self.parameters_button)
         main_layout.addLayout(name_row)
 
         # --- Helper to create framed connection rows ---
@@ -580,13 +569,15 @@ class FileDialogExample(QMainWindow):
         devices_connected = (self.device_states.get('Table360') == 'Connected' and
                              self.device_states.get('Camera') == 'Connected')
         self.start_button.setEnabled(bool(text) and devices_connected and not self.capture_in_progress)
+        self.batch_button.setEnabled(devices_connected and not self.capture_in_progress)
 
     def cycle_connect(self, device: str):
         if device == 'Table360':
             if self.device_states[device] == 'Not connected':
                 # Initialize hardware manager if not already done
                 if self.hardware_manager is None:
-                    self.hardware_manager = HardwareManager()
+                    self.hardware_manager = HardwareManager(capture_mode=self.capture_mode,
+                                                            staging_dir=self.staging_dir)
 
                 # Try to connect to serial
                 connected = self.hardware_manager.initialize_serial()
@@ -596,8 +587,7 @@ class FileDialogExample(QMainWindow):
             else:
                 # Disconnect
                 if self.hardware_manager and self.hardware_manager.serial_conn:
-                    self.hardware_manager.serial_conn.close()
-                    self.hardware_manager.serial_conn = None
+                    self.hardware_manager.close_serial()
                 self.device_states[device] = 'Not connected'
                 self.update_status_label(self.table_label, 'Not connected')
 
@@ -605,11 +595,13 @@ class FileDialogExample(QMainWindow):
         elif device == 'Camera':
             if self.device_states[device] == 'Not connected':
                 # Try to attach USB and check camera
+                if self.hardware_manager is None:
+                    self.hardware_manager = HardwareManager(capture_mode=self.capture_mode,
+                                                            staging_dir=self.staging_dir)
                 attached = self.attach_usb_to_wsl()  # This now includes binding
                 if attached:
-                    # Give it time to initialize
-                    time.sleep(4)
-                    connected = self.check_camera_connection()
+                    # Returns as soon as gPhoto2 sees the camera
+                    connected = self.hardware_manager.wait_for_camera(timeout=15)
 
                     if connected:
                         # Try to prepare camera
@@ -630,8 +622,7 @@ class FileDialogExample(QMainWindow):
                 # Disconnect camera
                 if self.camera_busid:
                     try:
-                        subprocess.run(["powershell", "-Command", f"usbipd detach --busid={self.camera_busid}"],
-                                       timeout=5)
+                        usb_inventory.run(['detach', f'--busid={self.camera_busid}'], timeout=5)
                     except:
                         pass
                 self.device_states[device] = 'Not connected'
@@ -669,17 +660,28 @@ class FileDialogExample(QMainWindow):
         self.capture_in_progress = True
         self.toggle_start_button()
 
+        # Frames are cropped and encoded while the table keeps turning
+        self.frame_stream = None
+        if self.stream_processing and self.direct_webp and self.processing_engine == "native":
+            self.frame_stream = FrameStream(self.selected_path, self.webp_profile, self.keep_png,
+                                            progress_callback=self.stream_progress)
+
         # Start the capture process in a separate thread
         self.capture_thread = self.CaptureThread(
             self.selected_path,
             self.hardware_manager,
             self.update_progress_callback,
-            self.camera_busid
+            self.camera_busid,
+            self.frame_stream
         )
         self.capture_thread.finished.connect(self.on_capture_finished)
         self.capture_thread.error_occurred.connect(self.show_error_message)  # Connect error signal
         self.capture_thread.start()
 
+    def stream_progress(self, done, total, message):
+        """Log streamed processing; the progress bar belongs to the capture meanwhile"""
+        logger.info(message.strip())
+
     def update_progress_callback(self, current, total, stage):
         """Update progress from capture thread"""
         progress_percent = int((current / total) * 100)
@@ -693,6 +695,9 @@ class FileDialogExample(QMainWindow):
         if success:
             self.process_photos()
         else:
+            if self.frame_stream:
+                self.frame_stream.cancel()
+                self.frame_stream = None
             self.update_progress(0, "Capture failed")
 
     # Thread class for capturing photos
@@ -702,27 +707,35 @@ class FileDialogExample(QMainWindow):
         finished = pyqtSignal(bool)
         error_occurred = pyqtSignal(str, str)
 
-        def __init__(self, save_path, hardware_manager, progress_callback, camera_busid):
+        def __init__(self, save_path, hardware_manager, progress_callback, camera_busid, frame_stream=None):
             super().__init__()
             self.save_path = save_path
             self.hardware_manager = hardware_manager
             self.progress_callback = progress_callback
             self.camera_busid = camera_busid
             self.hardware_manager.save_folder = save_path
+            self.hardware_manager.camera_busid = camera_busid
+            # Every frame that lands on disk is pushed to the processing stream
+            self.hardware_manager.frame_callback = frame_stream.submit if frame_stream else None
 
         def run(self):
+            self.finished.emit(self.capture())
+
+        def capture(self):
+            """Run the whole turntable sequence; True when all frames are on disk"""
             try:
                 # Turn off laser
                 if not self.hardware_manager.send_command(self.hardware_manager.COMMANDS["laser off"], "laser off"):
                     self.error_occurred.emit("Table360", "Failed to turn off laser")
-                    self.finished.emit(False)
-                    return
+                    return False
 
                 num_photos = 20
 
                 # Reset camera connection before starting sequence
                 self.hardware_manager.reset_usb_connection(self.camera_busid)
-                time.sleep(3)
+
+                # Keep one gPhoto2 shell open for the whole turntable run
+                self.hardware_manager.open_camera_session()
 
                 for i in range(1, num_photos + 1):
                     logger.info(f"▶ Obrót {i}/{num_photos}")
@@ -730,55 +743,208 @@ class FileDialogExample(QMainWindow):
                     # Report progress
                     self.progress_callback(i, num_photos, "capturing")
 
-                    # Start movement
-                    movement_success = self.hardware_manager.send_command(
-                        self.hardware_manager.COMMANDS["Lewo trzymanie"],
-                        "Lewo trzymanie"
-                    )
-
-                    if not movement_success:
+                    # Move to the next stop and wait until the table gets there
+                    if not self.hardware_manager.rotate_step(i, num_photos, move_time=0.8):
                         self.error_occurred.emit("Table360", "Movement command failed")
-                        self.finished.emit(False)
-                        return
-
-                    # Wait for movement to complete
-                    time.sleep(0.8)  # Reduced movement time
-
-                    # Stop movement
-                    if not self.hardware_manager.send_command(self.hardware_manager.COMMANDS["Stop"], "Stop"):
-                        self.error_occurred.emit("Table360", "Stop command failed")
-                        self.finished.emit(False)
-                        return
+                        return False
 
                     # Short delay before capture
                     time.sleep(0.2)
 
                     # Capture photo
                     filename = f"zdjecie_{i:02d}.jpg"
-                    success = self.hardware_manager.capture_dslr_photo(filename=filename)
+                    success = self.hardware_manager.capture_frame(filename)
 
+                    # capture_frame already escalates from re-trigger up to a USB reset
                     if not success:
-                        # Reset USB and try one more time
-                        self.hardware_manager.reset_usb_connection(self.camera_busid)
-                        time.sleep(3)
-                        success = self.hardware_manager.capture_dslr_photo(filename=filename)
+                        self.error_occurred.emit("Camera", f"Failed to capture photo {i}")
+                        return False
 
-                        if not success:
-                            self.error_occurred.emit("Camera", f"Failed to capture photo {i} after reset")
-                            self.finished.emit(False)
-                            return
+                # Pipelined/burst mode: wait for the frames still coming off the camera
+                if not self.hardware_manager.finish_downloads(self.progress_callback):
+                    self.error_occurred.emit("Camera", "Failed to download some photos")
+                    return False
 
                 logger.info(f"✅ Completed capturing {num_photos} photos")
 
                 # Turn laser back on
                 self.hardware_manager.send_command(self.hardware_manager.COMMANDS["laser on"], "laser on")
 
-                self.finished.emit(True)
+                return True
 
             except Exception as e:
                 logger.error(f"Capture error: {e}")
                 self.error_occurred.emit("System", f"Unexpected error: {str(e)}")
-                self.finished.emit(False)
+                return False
+            finally:
+                self.hardware_manager.close_camera_session()
+                self.hardware_manager.frame_callback = None
+
+    def start_batch(self):
+        """Ask for a list of product IDs and run them through capture, processing and upload"""
+        text, ok = QInputDialog.getMultiLineText(self, "Batch capture",
+                                                 "Product IDs (one per line or comma separated):")
+        product_ids = parse_product_ids(text) if ok else []
+        if not product_ids:
+            return
+
+        self.last_errors = {'Table360': '', 'Camera': '', 'System': ''}
+        self.capture_in_progress = True
+        self.toggle_start_button()
+        self.update_progress(0, f"Batch: 0/{len(product_ids)} done")
+
+        self.batch_thread = self.BatchThread(self, product_ids)
+        self.batch_thread.job_updated.connect(self.on_batch_update)
+        self.batch_thread.placement_needed.connect(self.confirm_placement)
+        self.batch_thread.finished.connect(self.on_batch_finished)
+        self.batch_thread.start()
+
+    def confirm_placement(self, product_id):
+        """Let the operator swap products on the table before the next capture"""
+        answer = QMessageBox.question(
+            self, "Next product", f"Place product {product_id} on the turntable and press OK.",
+            QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel)
+        if answer != QMessageBox.StandardButton.Ok:
+            self.batch_thread.cancel()
+        self.batch_thread.placement_done.set()
+
+    def on_batch_update(self, product_id, text):
+        counts = self.batch_thread.pipeline.counts() if self.batch_thread.pipeline else {}
+        finished = counts.get(DONE, 0) + counts.get(FAILED, 0)
+        total = len(self.batch_thread.product_ids)
+        self.update_progress(int(100 * finished / total), f"Batch {finished}/{total} — {product_id}: {text}")
+
+    def on_batch_finished(self, report):
+        self.capture_in_progress = False
+        self.toggle_start_button()
+        failed = [line for line in report if "FAILED" in line]
+        self.update_progress(100, f"Batch finished, {len(report) - len(failed)}/{len(report)} uploaded")
+        logger.info("Batch report:\n" + "\n".join(report))
+        if failed:
+            QMessageBox.warning(self, "Batch finished", "\n".join(report))
+        else:
+            QMessageBox.information(self, "Batch finished", "\n".join(report))
+
+    def start_parameter_update(self):
+        """Add the 360 parameter to many products, read from a CSV/text file or typed in"""
+        path, _ = QFileDialog.getOpenFileName(self, "Product IDs (cancel to type them in)", "",
+                                              "Product lists (*.csv *.txt);;All files (*)")
+        if path:
+            try:
+                product_ids = read_product_ids(path)
+            except (OSError, UnicodeDecodeError) as e:
+                QMessageBox.critical(self, "Error", f"Could not read {path}: {e}")
+                return
+        else:
+            text, ok = QInputDialog.getMultiLineText(self, "Update parameters",
+                                                     "Product IDs (one per line or comma separated):")
+            product_ids = parse_product_ids(text) if ok else []
+        if not product_ids:
+            return
+
+        self.parameters_button.setEnabled(False)
+        self.update_progress(0, f"Parameters: 0/{len(product_ids)} done")
+        self.parameter_thread = self.ParameterThread(product_ids)
+        self.parameter_thread.progress.connect(self.update_progress)
+        self.parameter_thread.finished.connect(self.on_parameter_update_finished)
+        self.parameter_thread.start()
+
+    def on_parameter_update_finished(self, report):
+        self.parameters_button.setEnabled(True)
+        failed = [line for line in report if "FAILED" in line]
+        self.update_progress(100, f"Parameters updated for {len(report) - len(failed)}/{len(report)} products")
+        logger.info("Parameter update report:\n" + "\n".join(report))
+        if failed:
+            QMessageBox.warning(self, "Parameters updated", "\n".join(report))
+        else:
+            QMessageBox.information(self, "Parameters updated", "\n".join(report))
+
+    class ParameterThread(QThread):
+        finished = pyqtSignal(list)
+        progress = pyqtSignal(int, str)
+
+        def __init__(self, product_ids):
+            super().__init__()
+            self.product_ids = product_ids
+
+        def run(self):
+            report = update_products(
+                self.product_ids,
+                progress_callback=lambda done, total, line: self.progress.emit(
+                    int(100 * done / total), f"Parameters {done}/{total} — {line}"))
+            self.finished.emit(report)
+
+    class BatchThread(QThread):
+        """Drives a BatchPipeline: product N+1 is captured while N is processed and N-1 uploads"""
+        finished = pyqtSignal(list)
+        job_updated = pyqtSignal(str, str)
+        placement_needed = pyqtSignal(str)
+
+        def __init__(self, window, product_ids):
+            super().__init__()
+            self.window = window
+            self.product_ids = product_ids
+            self.pipeline = None
+            self.cancelled = False
+            self.placement_done = threading.Event()
+
+        def run(self):
+            window = self.window
+            self.pipeline = BatchPipeline([
+                ("capture", self.capture_job, 1),
+                ("process", self.process_job, window.batch_process_workers),
+                ("upload", self.upload_job, window.batch_upload_workers),
+            ], on_update=lambda job: self.job_updated.emit(job.product_id, job.stage))
+            if self.cancelled:
+                self.pipeline.cancel()
+            for product_id in self.product_ids:
+                self.pipeline.submit(BatchJob(product_id, os.path.join(window.target_folder, product_id)))
+            self.finished.emit(self.pipeline.wait())
+
+        def cancel(self):
+            self.cancelled = True
+            # Before run() has built the pipeline, run() sees the flag instead
+            if self.pipeline:
+                self.pipeline.cancel()
+
+        def capture_job(self, job):
+            window = self.window
+            # Wait for the operator to put the product on the table
+            self.placement_done.clear()
+            self.placement_needed.emit(job.product_id)
+            self.placement_done.wait()
+            if self.cancelled:
+                return False
+
+            os.makedirs(job.folder, exist_ok=True)
+            frame_stream = None
+            if window.stream_processing and window.direct_webp and window.processing_engine == "native":
+                frame_stream = FrameStream(job.folder, window.webp_profile, window.keep_png,
+                                           progress_callback=window.stream_progress)
+            capture_thread = window.CaptureThread(
+                job.folder, window.hardware_manager,
+                lambda current, total, stage: self.job_updated.emit(job.product_id, f"{stage} {current}/{total}"),
+                window.camera_busid, frame_stream)
+            capture_thread.error_occurred.connect(window.show_error_message)
+            if not capture_thread.capture():
+                if frame_stream:
+                    frame_stream.cancel()
+                return False
+            job.data['frame_stream'] = frame_stream
+            return True
+
+        def process_job(self, job):
+            window = self.window
+            process_thread = window.ProcessThread(
+                job.folder, lambda value, text: self.job_updated.emit(job.product_id, text),
+                window.webp_profile, window.processing_engine, window.direct_webp, window.keep_png,
+                job.data.pop('frame_stream', None))
+            return process_thread.process()
+
+        def upload_job(self, job):
+            upload_thread = self.window.UploadThread(
+                job.folder, job.product_id, lambda value, text: self.job_updated.emit(job.product_id, text))
+            return upload_thread.upload()
 
     def process_photos(self):
         """Process the captured photos"""
@@ -786,7 +952,10 @@ class FileDialogExample(QMainWindow):
         self.update_progress(0, "Processing photos...")
 
         # Start processing in a separate thread
-        self.process_thread = self.ProcessThread(self.selected_path, self.update_progress)
+        self.process_thread = self.ProcessThread(self.selected_path, self.update_progress, self.webp_profile,
+                                                 self.processing_engine, self.direct_webp, self.keep_png,
+                                                 self.frame_stream)
+        self.frame_stream = None
         self.process_thread.finished.connect(self.on_processing_finished)
         self.process_thread.start()
 
@@ -801,37 +970,84 @@ class FileDialogExample(QMainWindow):
     class ProcessThread(QThread):
         finished = pyqtSignal(bool)
 
-        def __init__(self, folder_path, progress_callback):
+        def __init__(self, folder_path, progress_callback, webp_profile=DEFAULT_PROFILE, engine="native",
+                     direct_webp=False, keep_png=True, frame_stream=None):
             super().__init__()
+            self.frame_stream = frame_stream
             self.folder_path = folder_path
             self.progress_callback = progress_callback
+            self.webp_profile = webp_profile
+            self.engine = engine
+            self.direct_webp = direct_webp and engine == "native"
+            self.keep_png = keep_png
+            # Share of the progress bar (from 50%) taken by image processing
+            self.image_span = 50 if self.direct_webp else 25
 
         def run(self):
-            try:
-                # Update progress
-                self.progress_callback(50, "Running Photoshop automation...")
-
-                # Run Photoshop automation
-                win_path = os.path.abspath(self.folder_path).replace('/', '\\')
-                with open("folder_path.txt", "w") as f:
-                    f.write(win_path)
-
-                jsx_script = "auto_process.jsx"
-                photoshop_exe = r"C:\Program Files\Adobe\Adobe Photoshop 2024\Photoshop.exe"
+            self.finished.emit(self.process())
 
-                subprocess.run([photoshop_exe, jsx_script], check=True, timeout=300)
+        def process(self):
+            """Turn the captured set into WebPs; True on success"""
+            try:
+                if self.frame_stream:
+                    # Most frames were processed during capture; wait for the last ones
+                    self.progress_callback(90, "Finishing photo processing...")
+                    self.frame_stream.finish()
+                    self.progress_callback(100, "Processing complete!")
+                    return True
+                if self.engine == "photoshop":
+                    self.run_photoshop()
+                elif self.direct_webp:
+                    # Processed frames go straight to WebP, no PNG round-trip through the disk
+                    self.progress_callback(50, "Processing photos to WebP...")
+                    if not process_folder(self.folder_path, progress_callback=self.image_progress,
+                                          webp_profile=self.webp_profile, keep_png=self.keep_png):
+                        logger.error("No complete photo set to process")
+                        return False
+                    self.progress_callback(100, "Processing complete!")
+                    return True
+                else:
+                    # Crop, levels, backdrop cleanup and resize in worker processes
+                    self.progress_callback(50, "Processing photos...")
+                    process_folder(self.folder_path, progress_callback=self.image_progress)
 
                 # Update progress
                 self.progress_callback(75, "Converting to WebP...")
 
-                # Process to WebP
-                process_all(self.folder_path)
+                # Process to WebP, one encoder process per core
+                if not process_all(self.folder_path, progress_callback=self.encode_progress,
+                                   profile=self.webp_profile):
+                    logger.error("WebP conversion failed")
+                    return False
 
                 self.progress_callback(100, "Processing complete!")
-                self.finished.emit(True)
+                return True
             except Exception as e:
                 logger.error(f"Processing error: {e}")
-                self.finished.emit(False)
+                return False
+
+        def run_photoshop(self):
+            self.progress_callback(50, "Running Photoshop automation...")
+
+            # Run Photoshop automation
+            win_path = os.path.abspath(self.folder_path).replace('/', '\\')
+            with open("folder_path.txt", "w") as f:
+                f.write(win_path)
+
+            jsx_script = "auto_process.jsx"
+            photoshop_exe = r"C:\Program Files\Adobe\Adobe Photoshop 2024\Photoshop.exe"
+
+            subprocess.run([photoshop_exe, jsx_script], check=True, timeout=300)
+
+        def image_progress(self, done, total, message):
+            logger.info(message.strip())
+            if total:
+                self.progress_callback(50 + int(self.image_span * done / total), f"Processing photos {done}/{total}")
+
+        def encode_progress(self, done, total, message):
+            logger.info(message.strip())
+            if total:
+                self.progress_callback(75 + int(25 * done / total), f"Converting to WebP {done}/{total}")
 
     def upload_photos(self):
         """Upload the processed photos"""
@@ -870,6 +1086,10 @@ class FileDialogExample(QMainWindow):
             self.progress_callback = progress_callback
 
         def run(self):
+            self.finished.emit(self.upload())
+
+        def upload(self):
+            """Upload the WebP set for product_id; True on success"""
             try:
                 # Update progress
                 self.progress_callback(10, "Starting upload...")
@@ -880,15 +1100,14 @@ class FileDialogExample(QMainWindow):
 
                 if success:
                     self.progress_callback(100, "Upload complete!")
-                    self.finished.emit(True)
-                else:
-                    self.progress_callback(0, "Upload failed!")
-                    self.finished.emit(False)
+                    return True
+                self.progress_callback(0, "Upload failed!")
+                return False
 
             except Exception as e:
                 logger.error(f"Upload error: {e}")
                 self.progress_callback(0, f"Upload error: {e}")
-                self.finished.emit(False)
+                return False
 
     def update_progress(self, value, text):
         """Update progress bar and label"""
@@ -941,4 +1160,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # WebP encoding uses a process pool, which needs this in the frozen exe
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# AJAX requests still running on the page; the panel sends its XHRs through jQuery
+PENDING_REQUESTS_JS = "return (window.jQuery ? window.jQuery.active : 0)"
+POLL_INTERVAL = 0.2
+
+
+class StepTimer:
+    """Time spent per named step, to show where an upload's seconds go"""
+
+    def __init__(self, name):
+        self.name = name
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.monotonic() - started))
+
+    def total(self):
+        return sum(seconds for _, seconds in self.steps)
+
+    def report(self):
+        lines = [f"Timing for {self.name}: {self.total():.1f}s"]
+        for name, seconds in sorted(self.steps, key=lambda step: -step[1]):
+            lines.append(f"  {seconds:6.2f}s  {name}")
+        return "\n".join(lines)
+
+
+def until(driver, condition, timeout=10):
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition)
+
+
+def count(driver, selector):
+    """Matching elements, checked with JavaScript so the driver's implicit wait does not apply"""
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length", selector)
+
+
+def page_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def requests_idle(driver):
+    return page_ready(driver) and driver.execute_script(PENDING_REQUESTS_JS) == 0
+
+
+def wait_until_idle(driver, timeout=15):
+    """Wait for the document to load and the page's AJAX requests to finish"""
+    until(driver, requests_idle, timeout)
+
+
+def wait_for_reload(driver, element, timeout=15):
+    """After submitting a form: wait for the old page to go away (if it does) and the new one to settle"""
+    try:
+        until(driver, EC.staleness_of(element), timeout)
+    except TimeoutException:
+        pass
+    wait_until_idle(driver, timeout)
+
+
+def wait_for_selected(driver, element, timeout=5):
+    until(driver, lambda _: element.is_selected(), timeout)
+
+
+def count_listed(driver, texts, selector="span"):
+    """How many of `texts` appear as the exact text of an element matching `selector`"""
+    return driver.execute_script("""
+        const shown = new Set(Array.from(document.querySelectorAll(arguments[1]), el => el.textContent.trim()));
+        return arguments[0].filter(text => shown.has(text)).length;
+    """, list(texts), selector)
+
+
+def wait_for_work_done(driver, busy_selector, texts, timeout=120, settle=2):
+    """Wait for a job shown by `busy_selector` elements (e.g. upload progress bars) to finish.
+
+    Done means every one of `texts` is listed on the page, or the busy
+    elements were seen and have stayed away for `settle` seconds (so a gap
+    between two files does not count). Returns False after `timeout`.
+    """
+    last_busy = []
+
+    def done(d):
+        if count(d, busy_selector) > 0:
+            last_busy[:] = [time.monotonic()]
+            return False
+        if last_busy and time.monotonic() - last_busy[0] >= settle:
+            return True
+        return count_listed(d, texts) == len(texts)
+
+    try:
+        until(driver, done, timeout)
+        return True
+    except TimeoutException:
+        return False
+
+
+def visible_suggestion(driver, selector, text):
+    """True once an element matching `selector` is visible and contains `text`"""
+    return driver.execute_script("""
+        return Array.from(document.querySelectorAll(arguments[0])).some(el =>
+            el.getClientRects().length > 0 && el.textContent.toLowerCase().includes(arguments[1].toLowerCase()));
+    """, selector, text)
+
+
+def wait_for_suggestion(driver, selector, text, timeout=10):
+    """Wait for an autocomplete list to show a suggestion for `text`; False on timeout.
+
+    The lookup is debounced, so right after typing no request is running yet
+    and wait_until_idle alone can return before the list is filled.
+    """
+    try:
+        until(driver, lambda d: visible_suggestion(d, selector, text), timeout)
+        return True
+    except TimeoutException:
+        return False
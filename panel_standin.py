@@ -0,0 +1,100 @@
+"""Local stand-in for the shop panel, for trying the HTTP uploader without the real shop.
+
+    python panel_standin.py --port 8765 --root standin_files
+
+then point PanelClient at http://127.0.0.1:8765/panel/ with user "operator",
+password "operator". Serves the requests described by PANEL_ENDPOINTS and
+the uploaded files under /files/<dir>/<name>. It is built from that same
+table, so it shows the client works as designed, not that the real panel
+accepts these requests.
+"""
+import argparse
+import os
+import secrets
+from urllib.parse import urlsplit
+
+from flask import Flask, abort, jsonify, redirect, request, send_from_directory, session
+
+from http_uploader import PANEL_ENDPOINTS, UPLOAD_ROOT
+
+USERNAME = "operator"
+PASSWORD = "operator"
+
+
+def endpoint_route(name):
+    """Path and ?action= value of an endpoint"""
+    parts = urlsplit(PANEL_ENDPOINTS[name]["path"])
+    action = dict(pair.split("=", 1) for pair in parts.query.split("&") if "=" in pair).get("action")
+    return "/panel/" + parts.path, action
+
+
+def field(name, key):
+    return PANEL_ENDPOINTS[name]["fields"][key]
+
+
+def create_app(root):
+    app = Flask(__name__)
+    app.secret_key = secrets.token_hex(16)
+    os.makedirs(os.path.join(root, UPLOAD_ROOT), exist_ok=True)
+
+    def local_dir(directory):
+        path = os.path.normpath(os.path.join(root, directory))
+        if not path.startswith(os.path.normpath(root)):
+            abort(400)
+        return path
+
+    login_path, _ = endpoint_route("login")
+    files_path, _ = endpoint_route("check")
+
+    @app.route(login_path, methods=["GET", "POST"])
+    def login():
+        if request.method == "POST":
+            if (request.form.get(field("login", "username")) == USERNAME and
+                    request.form.get(field("login", "password")) == PASSWORD):
+                session["user"] = USERNAME
+                return redirect(files_path)
+        return f'<form method="post"><input id="{field("login", "username")}"></form>'
+
+    @app.route(files_path, methods=["GET", "POST"])
+    def files():
+        if "user" not in session:
+            return redirect(login_path)
+        action = request.args.get("action")
+        if action is None:
+            return f'<span id="{PANEL_ENDPOINTS["check"]["marker"]}">{USERNAME}</span>'
+        if action == endpoint_route("mkdir")[1]:
+            parent = request.form[field("mkdir", "parent")]
+            os.makedirs(local_dir(os.path.join(parent, request.form[field("mkdir", "name")])), exist_ok=True)
+            return "OK"
+        if action == endpoint_route("upload")[1]:
+            directory = local_dir(request.form[field("upload", "dir")])
+            if not os.path.isdir(directory):
+                abort(404)
+            upload = request.files[field("upload", "file")]
+            upload.save(os.path.join(directory, os.path.basename(upload.filename)))
+            return "OK"
+        if action == endpoint_route("list")[1]:
+            directory = local_dir(request.args[field("list", "dir")])
+            if not os.path.isdir(directory):
+                abort(404)
+            return jsonify([{"name": name, "size": os.path.getsize(os.path.join(directory, name))}
+                            for name in sorted(os.listdir(directory))])
+        abort(400)
+
+    @app.route("/files/<path:name>", methods=["GET", "HEAD"])
+    def public_file(name):
+        return send_from_directory(root, name)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the shop panel")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default="standin_files", help="where uploaded files are stored")
+    args = parser.parse_args()
+    create_app(os.path.abspath(args.root)).run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
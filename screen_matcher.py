@@ -0,0 +1,160 @@
+import time
+from collections import namedtuple
+
+import pyautogui
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+Box = namedtuple("Box", "left top width height")
+
+# The coarse pass matches at this scale; a hit is then confirmed at full resolution
+COARSE_SCALE = 0.5
+# The coarse score may be this much lower than the requested confidence and still be refined
+COARSE_SLACK = 0.15
+# Templates smaller than this (in pixels, after scaling) are matched at full resolution only
+MIN_COARSE_SIZE = 16
+# Best coarse hits confirmed at full resolution before falling back to a full-resolution search
+COARSE_CANDIDATES = 3
+
+
+class TemplateMatcher:
+    """Finds template images on screen with OpenCV, faster than pyautogui.locateOnScreen.
+
+    Templates are read once and kept in memory with a downscaled copy. The
+    place each template was last found is searched first, the rest of the
+    screen gets a coarse pass at COARSE_SCALE whose best few hits are
+    confirmed at full resolution, and when none holds up the whole screen is
+    matched at full resolution. Several templates can be matched against one
+    screenshot. Matching is done in grayscale. Without
+    OpenCV/NumPy it falls back to pyautogui.locateOnScreen.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.last_found = {}
+
+    def template(self, path):
+        """(full size, coarse) grayscale copies of a template image; None if it cannot be read"""
+        if path not in self.templates:
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                print(f"Cannot read template {path}")
+                self.templates[path] = None
+            else:
+                coarse = cv2.resize(image, None, fx=COARSE_SCALE, fy=COARSE_SCALE, interpolation=cv2.INTER_AREA)
+                self.templates[path] = (image, coarse)
+        return self.templates[path]
+
+    def preload(self, paths):
+        if cv2 is not None:
+            for path in paths:
+                self.template(path)
+
+    def screenshot(self):
+        """The screen as a full size and a coarse grayscale array"""
+        screen = cv2.cvtColor(np.asarray(pyautogui.screenshot()), cv2.COLOR_RGB2GRAY)
+        coarse = cv2.resize(screen, None, fx=COARSE_SCALE, fy=COARSE_SCALE, interpolation=cv2.INTER_AREA)
+        return screen, coarse
+
+    @staticmethod
+    def match_in(screen, template, left, top, right, bottom):
+        """Best match of `template` inside screen[top:bottom, left:right]; (score, x, y) in screen coordinates"""
+        height, width = template.shape
+        left, top = max(0, left), max(0, top)
+        right, bottom = min(screen.shape[1], right), min(screen.shape[0], bottom)
+        if right - left < width or bottom - top < height:
+            return -1.0, 0, 0
+        result = cv2.matchTemplate(screen[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        return score, left + x, top + y
+
+    def find(self, path, screens, confidence):
+        templates = self.template(path)
+        if templates is None:
+            return None
+        screen, coarse_screen = screens
+        template, coarse_template = templates
+        height, width = template.shape
+
+        # Where it was last time, with a margin of one template size around it
+        box = self.last_found.get(path)
+        if box:
+            score, x, y = self.match_in(screen, template, box.left - width, box.top - height,
+                                        box.left + 2 * width, box.top + 2 * height)
+            if score >= confidence:
+                return Box(x, y, width, height)
+
+        if min(coarse_template.shape) < MIN_COARSE_SIZE:
+            score, x, y = self.match_in(screen, template, 0, 0, screen.shape[1], screen.shape[0])
+            return Box(x, y, width, height) if score >= confidence else None
+
+        for x, y in self.coarse_candidates(coarse_screen, coarse_template, confidence - COARSE_SLACK):
+            # Confirm at full resolution around the coarse hit
+            x, y = int(x / COARSE_SCALE), int(y / COARSE_SCALE)
+            pad = int(2 / COARSE_SCALE)
+            score, x, y = self.match_in(screen, template, x - pad, y - pad, x + width + pad, y + height + pad)
+            if score >= confidence:
+                return Box(x, y, width, height)
+
+        # Downscaling blurs thin text and 1px borders; the coarse pass can miss those entirely
+        score, x, y = self.match_in(screen, template, 0, 0, screen.shape[1], screen.shape[0])
+        return Box(x, y, width, height) if score >= confidence else None
+
+    @staticmethod
+    def coarse_candidates(coarse_screen, coarse_template, min_score):
+        """Up to COARSE_CANDIDATES best (x, y) coarse hits scoring at least `min_score`, best first"""
+        if coarse_screen.shape[0] < coarse_template.shape[0] or coarse_screen.shape[1] < coarse_template.shape[1]:
+            return []
+        result = cv2.matchTemplate(coarse_screen, coarse_template, cv2.TM_CCOEFF_NORMED)
+        height, width = coarse_template.shape
+        candidates = []
+        for _ in range(COARSE_CANDIDATES):
+            _, score, _, (x, y) = cv2.minMaxLoc(result)
+            if score < min_score:
+                break
+            candidates.append((x, y))
+            # Blank out this hit so the next one is somewhere else
+            result[max(0, y - height // 2):y + height // 2 + 1, max(0, x - width // 2):x + width // 2 + 1] = -1.0
+        return candidates
+
+    def locate_all(self, paths, confidence=0.9):
+        """{path: Box or None} for several templates, all matched against one screenshot"""
+        if cv2 is None:
+            return {path: self.locate_with_pyautogui(path, confidence) for path in paths}
+        screens = self.screenshot()
+        found = {}
+        for path in paths:
+            found[path] = self.find(path, screens, confidence)
+            if found[path]:
+                self.last_found[path] = found[path]
+        return found
+
+    def locate(self, path, confidence=0.9):
+        return self.locate_all([path], confidence)[path]
+
+    @staticmethod
+    def locate_with_pyautogui(path, confidence):
+        try:
+            location = pyautogui.locateOnScreen(path, confidence=confidence)
+        except Exception:
+            return None
+        return Box(*location) if location else None
+
+    def wait_for(self, paths, timeout=30, interval=0.5, confidence=0.9):
+        """First of `paths` to appear on screen as (path, Box), or (None, None) after `timeout` seconds"""
+        if isinstance(paths, str):
+            paths = [paths]
+        deadline = time.time() + timeout
+        while True:
+            found = self.locate_all(paths, confidence)
+            for path in paths:
+                if found[path]:
+                    return path, found[path]
+            if time.time() + interval > deadline:
+                return None, None
+            time.sleep(interval)
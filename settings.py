@@ -0,0 +1,27 @@
+import json
+import os
+
+# Small per-user store for values worth remembering between runs (e.g. the last working COM port)
+SETTINGS_PATH = os.path.join(os.path.expanduser("~"), ".360operator.json")
+
+
+def load_settings():
+    try:
+        with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_settings(**values):
+    """Merge `values` into the settings file"""
+    settings = load_settings()
+    settings.update(values)
+    tmp_path = SETTINGS_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp_path, SETTINGS_PATH)
+    except OSError as e:
+        print(f"Could not save settings: {e}")
+    return settings
@@ -0,0 +1,232 @@
+import collections
+import queue
+import struct
+import threading
+import time
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+# The Table360 controller speaks TMCL: 9-byte frames of
+# [module address, command, type, motor, value (int32 big-endian), checksum]
+FRAME_SIZE = 9
+MODULE_ADDRESS = 1
+HOST_ADDRESS = 2
+
+TMCL_ROR = 1
+TMCL_ROL = 2
+TMCL_MST = 3
+TMCL_MVP = 4
+TMCL_SAP = 5
+TMCL_GAP = 6
+TMCL_SIO = 14
+
+MVP_ABS = 0
+MVP_REL = 1
+
+AP_ACTUAL_POSITION = 1
+AP_TARGET_REACHED = 8
+
+STATUS_OK = 100
+
+# "Obrót +90" (010401000000f5dfda) is a relative move of 0xf5df microsteps
+STEPS_PER_90 = 0xF5DF
+STEPS_PER_REV = 4 * STEPS_PER_90
+
+
+class TableControllerError(Exception):
+    """Raised when the controller does not answer or rejects a command"""
+
+
+def checksum(data):
+    return sum(data) & 0xFF
+
+
+def build_frame(command, type_=0, motor=0, value=0, address=MODULE_ADDRESS):
+    """Build a TMCL command frame, e.g. build_frame(TMCL_MVP, MVP_REL, 0, 62943)"""
+    body = struct.pack('>BBBBi', address, command, type_, motor, value)
+    return body + bytes([checksum(body)])
+
+
+def is_valid_frame(frame):
+    return len(frame) == FRAME_SIZE and checksum(frame[:8]) == frame[8]
+
+
+def parse_reply(frame):
+    """Split a TMCL reply frame into (status, command, value), validating its checksum"""
+    if len(frame) != FRAME_SIZE:
+        raise TableControllerError(f"Short reply from controller: {frame.hex()}")
+    if checksum(frame[:8]) != frame[8]:
+        raise TableControllerError(f"Bad checksum in reply: {frame.hex()}")
+    _reply_address, _module_address, status, command, value = struct.unpack('>BBBBi', frame[:8])
+    return status, command, value
+
+
+class SerialEngine:
+    """Queued, non-blocking I/O for the controller's serial port.
+
+    A writer thread sends queued frames and a reader thread parses replies,
+    resolving the Future returned by submit() for each command in order.
+    A dead port fails every pending command at once instead of hanging.
+    """
+
+    def __init__(self, serial_conn):
+        self.serial_conn = serial_conn
+        self.commands = queue.Queue()
+        self.pending = collections.deque()
+        self.lock = threading.Lock()
+        self.replies_seen = 0
+        self.error = None
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self._write_loop, daemon=True),
+                        threading.Thread(target=self._read_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.commands.put(None)
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self._fail_pending(TableControllerError("Serial engine stopped"))
+
+    def submit(self, frame, expect_reply=True):
+        """Queue a frame; the returned Future resolves to (status, command, value).
+
+        With expect_reply=False (a controller that never answers) the frame is
+        not waited on: its Future resolves to None once the frame is written.
+        """
+        future = Future()
+        if not is_valid_frame(frame):
+            future.set_exception(TableControllerError(f"Malformed command frame: {frame.hex()}"))
+        elif self.error:
+            future.set_exception(TableControllerError(f"Serial port failed: {self.error}"))
+        else:
+            self.commands.put((frame, future, expect_reply))
+        return future
+
+    def request(self, frame, timeout=0.5):
+        """Send a frame and wait for the controller to acknowledge it"""
+        future = self.submit(frame)
+        try:
+            status, command, value = future.result(timeout)
+        except FutureTimeout:
+            with self.lock:
+                self.pending = collections.deque(item for item in self.pending if item[1] is not future)
+            raise TableControllerError(f"No reply to {frame.hex()} within {timeout}s")
+        if status != STATUS_OK:
+            raise TableControllerError(f"Controller rejected {frame.hex()} with status {status}")
+        return status, command, value
+
+    def _write_loop(self):
+        while self.running:
+            item = self.commands.get()
+            if item is None:
+                return
+            frame, future, expect_reply = item
+            if expect_reply:
+                with self.lock:
+                    self.pending.append((frame[1], future))
+            try:
+                self.serial_conn.write(frame)
+            except Exception as e:
+                with self.lock:
+                    self.pending = collections.deque(p for p in self.pending if p[1] is not future)
+                future.set_exception(TableControllerError(f"Write of {frame.hex()} failed: {e}"))
+                continue
+            if not expect_reply:
+                future.set_result(None)
+
+    def _read_loop(self):
+        buffer = b''
+        while self.running:
+            try:
+                chunk = self.serial_conn.read(FRAME_SIZE - len(buffer) if len(buffer) < FRAME_SIZE else 1)
+            except Exception as e:
+                if self.running:
+                    logger.error(f"❌ Serial read failed: {e}")
+                    self.error = e
+                    self._fail_pending(TableControllerError(f"Serial port failed: {e}"))
+                return
+            buffer += chunk
+            while len(buffer) >= FRAME_SIZE:
+                if not is_valid_frame(buffer[:FRAME_SIZE]):
+                    # Lost sync (noise or a partial frame): slide forward one byte
+                    buffer = buffer[1:]
+                    continue
+                reply, buffer = buffer[:FRAME_SIZE], buffer[FRAME_SIZE:]
+                self._dispatch(parse_reply(reply))
+
+    def _dispatch(self, reply):
+        self.replies_seen += 1
+        command = reply[1]
+        with self.lock:
+            while self.pending:
+                expected, future = self.pending.popleft()
+                if expected == command:
+                    if not future.done():
+                        future.set_result(reply)
+                    return
+                # The controller skipped a reply; that command will never be answered
+                if not future.done():
+                    future.set_exception(TableControllerError(f"No reply to command {expected}"))
+        logger.debug(f"Unsolicited reply from controller: {reply}")
+
+    def _fail_pending(self, error):
+        with self.lock:
+            pending, self.pending = self.pending, collections.deque()
+        for _command, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+
+class TablePositioner:
+    """Closed-loop turntable stepping using the controller's move-to-position command.
+
+    Instead of running "Lewo trzymanie" for a fixed time, every step sends the
+    exact microstep distance and then polls the controller until it reports
+    the target position as reached.
+    """
+
+    def __init__(self, engine, steps_per_rev=STEPS_PER_REV, motor=0, direction=1, poll_interval=0.02):
+        self.engine = engine
+        self.steps_per_rev = steps_per_rev
+        self.motor = motor
+        self.direction = direction
+        self.poll_interval = poll_interval
+
+    def transact(self, frame):
+        """Send one frame and return (status, command, value) from the controller's reply"""
+        return self.engine.request(frame)
+
+    def move_relative(self, steps):
+        self.transact(build_frame(TMCL_MVP, MVP_REL, self.motor, steps * self.direction))
+
+    def target_reached(self):
+        _status, _command, value = self.transact(build_frame(TMCL_GAP, AP_TARGET_REACHED, self.motor))
+        return value == 1
+
+    def wait_until_reached(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not self.target_reached():
+            if time.monotonic() > deadline:
+                raise TableControllerError("Turntable did not reach its target position")
+            time.sleep(self.poll_interval)
+
+    def step_distance(self, index, count):
+        """Microsteps from position index-1 to index; rounding never accumulates over a turn"""
+        return (round(index * self.steps_per_rev / count)
+                - round((index - 1) * self.steps_per_rev / count))
+
+    def rotate_step(self, index, count, timeout=10):
+        """Move to position `index` (1-based) of `count` evenly spaced stops and wait for it"""
+        steps = self.step_distance(index, count)
+        started = time.monotonic()
+        self.move_relative(steps)
+        self.wait_until_reached(timeout)
+        logger.debug(f"Step {index}/{count}: {steps} microsteps in {time.monotonic() - started:.2f}s")
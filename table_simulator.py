@@ -0,0 +1,115 @@
+"""Pseudo-terminal stand-in for the Table360 controller (Linux/WSL only).
+
+    sim = TableSimulator()
+    sim.start()
+    engine = SerialEngine(serial.Serial(sim.port, baudrate=19200, timeout=0.05))
+    engine.start()
+    TablePositioner(engine).rotate_step(1, 20)
+    engine.stop()
+    sim.stop()
+
+It answers every TMCL frame with a reply frame and models motion time, so
+the closed-loop positioning can be exercised without the turntable.
+"""
+import os
+import struct
+import threading
+import time
+import tty
+
+from table_controller import (FRAME_SIZE, HOST_ADDRESS, MODULE_ADDRESS, STATUS_OK, TMCL_ROR, TMCL_ROL,
+                              TMCL_MST, TMCL_MVP, TMCL_SAP, TMCL_GAP, TMCL_SIO, MVP_ABS,
+                              AP_ACTUAL_POSITION, AP_TARGET_REACHED, checksum)
+
+STATUS_WRONG_CHECKSUM = 1
+STATUS_INVALID_COMMAND = 2
+
+
+class TableSimulator:
+    def __init__(self, steps_per_second=60000):
+        self.steps_per_second = steps_per_second
+        self.target = 0
+        self.move_started = 0.0
+        self.move_from = 0
+        self.velocity = 0
+        self.received = []
+        self.master_fd = None
+        self.slave_fd = None
+        self.thread = None
+        self.running = False
+
+    @property
+    def port(self):
+        return os.ttyname(self.slave_fd)
+
+    def start(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        for fd in (self.slave_fd, self.master_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def current_position(self):
+        """Position at this instant, interpolated while a move is running"""
+        if self.velocity:
+            return self.move_from + int(self.velocity * (time.monotonic() - self.move_started))
+        distance = self.target - self.move_from
+        travelled = int(self.steps_per_second * (time.monotonic() - self.move_started))
+        if travelled >= abs(distance):
+            return self.target
+        return self.move_from + (travelled if distance > 0 else -travelled)
+
+    def _start_move(self, target):
+        self.move_from = self.current_position()
+        self.target = target
+        self.velocity = 0
+        self.move_started = time.monotonic()
+
+    def _serve(self):
+        buffer = b''
+        while self.running:
+            try:
+                chunk = os.read(self.master_fd, 64)
+            except OSError:
+                return
+            buffer += chunk
+            while len(buffer) >= FRAME_SIZE:
+                frame, buffer = buffer[:FRAME_SIZE], buffer[FRAME_SIZE:]
+                self.received.append(frame)
+                try:
+                    os.write(self.master_fd, self.handle(frame))
+                except OSError:
+                    return
+
+    def handle(self, frame):
+        """Return the reply frame for one command frame"""
+        _address, command, type_, _motor, value = struct.unpack('>BBBBi', frame[:8])
+        status, reply_value = STATUS_OK, value
+        if checksum(frame[:8]) != frame[8]:
+            status = STATUS_WRONG_CHECKSUM
+        elif command in (TMCL_ROR, TMCL_ROL):
+            self.move_from = self.current_position()
+            self.move_started = time.monotonic()
+            self.velocity = value if command == TMCL_ROR else -value
+        elif command == TMCL_MST:
+            self._start_move(self.current_position())
+        elif command == TMCL_MVP:
+            base = 0 if type_ == MVP_ABS else self.current_position()
+            self._start_move(base + value)
+        elif command == TMCL_GAP and type_ == AP_TARGET_REACHED:
+            reply_value = int(not self.velocity and self.current_position() == self.target)
+        elif command == TMCL_GAP and type_ == AP_ACTUAL_POSITION:
+            reply_value = self.current_position()
+        elif command not in (TMCL_SAP, TMCL_GAP, TMCL_SIO):
+            status = STATUS_INVALID_COMMAND
+        body = struct.pack('>BBBBi', HOST_ADDRESS, MODULE_ADDRESS, status, command, reply_value)
+        return body + bytes([checksum(body)])
@@ -0,0 +1,54 @@
+import threading
+
+import browser_sessions
+from browser_sessions import BrowserSessionPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+
+    def get(self, url):
+        pass
+
+    def get_cookies(self):
+        return []
+
+    def quit(self):
+        self.closed = True
+
+
+def make_pool(size):
+    return BrowserSessionPool(FakeDriver, login=lambda driver: None, is_logged_in=lambda driver: True,
+                              start_url="http://panel.test/", size=size)
+
+
+def test_waiter_gets_new_driver_when_holder_releases_broken(monkeypatch):
+    monkeypatch.setattr(browser_sessions, "load_cookies", lambda key: [])
+    pool = make_pool(size=1)
+    holder = pool.acquire()
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()), daemon=True)
+    waiter.start()
+    waiter.join(timeout=0.2)
+    assert waiter.is_alive()
+
+    pool.release(holder, broken=True)
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+    assert holder.closed
+    assert acquired and acquired[0] is not holder
+    pool.close()
+
+
+def test_released_driver_is_reused(monkeypatch):
+    monkeypatch.setattr(browser_sessions, "load_cookies", lambda key: [])
+    pool = make_pool(size=2)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+    assert first is second
+    assert len(pool.drivers) == 1
+    pool.close()
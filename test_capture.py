@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+import pytest
+
+import capture_files
+from hardware_handler import HardwareManager
+
+FAKE_GPHOTO2 = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_gphoto2.py')]
+FRAMES = 5
+
+
+@pytest.fixture(autouse=True)
+def fast_camera(monkeypatch):
+    monkeypatch.setenv('FAKE_GPHOTO2_DELAY', '0')
+    monkeypatch.setenv('FAKE_GPHOTO2_TRANSFER_DELAY', '0.01')
+
+
+def capture_frames(manager, count=FRAMES):
+    """What capture_sequence does per frame, without the turntable"""
+    manager.open_camera_session()
+    try:
+        for i in range(1, count + 1):
+            assert manager.capture_frame(f"zdjecie_{i:02d}.jpg")
+        assert manager.finish_downloads()
+    finally:
+        manager.close_camera_session()
+        if manager.staging:
+            manager.staging.stop()
+
+
+def saved_frames(folder):
+    """{file name: contents} of the captured frames"""
+    frames = {}
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                frames[name] = f.read()
+    return frames
+
+
+def test_staged_frames_keep_their_content_when_the_camera_reuses_one_name(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_GPHOTO2_FILENAME', 'capt0000.jpg')
+    # Slow moves to Windows, so the next download lands while the previous frame is still staged
+    move = capture_files.shutil.move
+    monkeypatch.setattr(capture_files.shutil, 'move', lambda src, dst: (time.sleep(0.1), move(src, dst))[1])
+
+    manager = HardwareManager(save_folder=str(tmp_path / "out"), gphoto_command=FAKE_GPHOTO2,
+                              capture_mode="pipelined", staging_dir=str(tmp_path / "staging"))
+    capture_frames(manager)
+
+    frames = saved_frames(tmp_path / "out")
+    assert sorted(frames) == [f"zdjecie_{i:02d}.jpg" for i in range(1, FRAMES + 1)]
+    assert len(set(frames.values())) == FRAMES
+
+
+@pytest.mark.parametrize("staging", [False, True], ids=["direct", "staged"])
+@pytest.mark.parametrize("mode", ["sequential", "pipelined", "burst"])
+def test_every_mode_saves_each_frame_in_order(tmp_path, mode, staging):
+    manager = HardwareManager(save_folder=str(tmp_path / "out"), gphoto_command=FAKE_GPHOTO2, capture_mode=mode,
+                              staging_dir=str(tmp_path / "staging") if staging else None)
+    capture_frames(manager)
+
+    frames = saved_frames(tmp_path / "out")
+    assert sorted(frames) == [f"zdjecie_{i:02d}.jpg" for i in range(1, FRAMES + 1)]
+    for i in range(1, FRAMES + 1):
+        assert frames[f"zdjecie_{i:02d}.jpg"].endswith(f"frame {i}".encode())
+    if staging:
+        assert not os.listdir(tmp_path / "staging")
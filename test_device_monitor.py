@@ -0,0 +1,87 @@
+import time
+
+import device_monitor
+import hardware_handler
+from device_monitor import FakeDeviceEvents, wait_for_camera, wait_for_usb_state, wait_until
+from hardware_handler import HardwareManager
+from usb_inventory import UsbDevice
+
+
+def test_present_camera_is_ready_on_the_first_check():
+    source = FakeDeviceEvents()
+    started = time.monotonic()
+    assert wait_for_camera(source, timeout=5)
+    assert source.checks == 1
+    assert time.monotonic() - started < 0.1
+
+
+def test_replugged_camera_is_picked_up_soon_after_it_returns():
+    source = FakeDeviceEvents()
+    source.unplug(0.5)
+    started = time.monotonic()
+    assert wait_for_camera(source, timeout=5)
+    elapsed = time.monotonic() - started
+    assert 0.5 <= elapsed < 1.2
+    # Backoff: a handful of checks rather than one every initial_delay
+    assert source.checks <= 6
+
+
+def test_missing_camera_gives_up_at_the_timeout():
+    source = FakeDeviceEvents(present=False)
+    started = time.monotonic()
+    assert not wait_for_camera(source, timeout=0.5)
+    assert 0.5 <= time.monotonic() - started < 1.0
+
+
+def test_backoff_grows_and_is_capped():
+    checks = []
+    assert not wait_until(lambda: checks.append(time.monotonic()), timeout=1.2,
+                          initial_delay=0.05, max_delay=0.2, factor=2)
+    gaps = [later - earlier for earlier, later in zip(checks, checks[1:])]
+    assert gaps[1] > gaps[0]
+    assert max(gaps) < 0.3
+
+
+class FakeUsbipd:
+    """usbipd detach/attach for one camera, driving a FakeDeviceEvents like the real re-enumeration"""
+
+    def __init__(self, source, busid="2-1", enumerate_after=0.3):
+        self.source = source
+        self.busid = busid
+        self.enumerate_after = enumerate_after
+        self.attached = True
+        self.calls = []
+
+    def run(self, args, timeout=None):
+        self.calls.append(args[0])
+        if args[0] == 'detach':
+            self.attached = False
+            self.source.unplug(float('inf'))
+        elif args[0] == 'attach':
+            self.attached = True
+            self.source.unplug(self.enumerate_after)
+
+    def devices(self, refresh=False):
+        state = "Attached" if self.attached else "Shared"
+        return [UsbDevice(self.busid, "04a9:32d4", "Canon EOS 250D", state)]
+
+
+def test_usb_state_is_polled_until_reached(monkeypatch):
+    usbipd = FakeUsbipd(FakeDeviceEvents())
+    monkeypatch.setattr(device_monitor, "usb_inventory", usbipd)
+    assert wait_for_usb_state("2-1", attached=True, timeout=0.2)
+    assert not wait_for_usb_state("2-1", attached=False, timeout=0.2)
+    assert wait_for_usb_state("9-9", attached=False, timeout=0.2)
+
+
+def test_usb_reset_returns_once_the_camera_reenumerates(monkeypatch):
+    manager = HardwareManager()
+    manager.device_source = FakeDeviceEvents()
+    usbipd = FakeUsbipd(manager.device_source)
+    monkeypatch.setattr(hardware_handler, "usb_inventory", usbipd)
+    monkeypatch.setattr(device_monitor, "usb_inventory", usbipd)
+
+    started = time.monotonic()
+    assert manager.reset_usb_connection("2-1")
+    assert usbipd.calls == ['detach', 'attach']
+    assert 0.3 <= time.monotonic() - started < 1.5
@@ -0,0 +1,131 @@
+import os
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import http_uploader
+import panel_standin
+from http_uploader import PanelClient, PanelError, UploadJournal, UPLOAD_ROOT, verify_public_files
+
+PRODUCT_ID = "12345"
+FRAMES = 6
+
+
+@pytest.fixture
+def panel(tmp_path, monkeypatch):
+    """Base URL of a panel_standin served on a free port, and the folder it stores uploads in"""
+    monkeypatch.setattr(http_uploader, "COOKIES_PATH", str(tmp_path / "cookies.json"))
+    root = tmp_path / "panel"
+    server = make_server("127.0.0.1", 0, panel_standin.create_app(str(root)), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", root
+    server.shutdown()
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def frames(tmp_path):
+    folder = tmp_path / "WEBP Files"
+    folder.mkdir()
+    paths = []
+    for i in range(1, FRAMES + 1):
+        path = folder / f"zdjecie_{i:02d}.webp"
+        path.write_bytes(b"RIFF" + bytes([i]) * (100 + i))
+        paths.append(str(path))
+    return paths
+
+
+def client(base_url, password=panel_standin.PASSWORD):
+    return PanelClient(panel_standin.USERNAME, password, base_url=base_url + "panel/")
+
+
+def uploaded(root):
+    directory = root / UPLOAD_ROOT / PRODUCT_ID
+    return sorted(os.listdir(directory)) if directory.is_dir() else []
+
+
+def test_upload_set_sends_every_frame_and_records_it(panel, frames):
+    base_url, root = panel
+    panel_client = client(base_url)
+    journal = UploadJournal(os.path.dirname(frames[0]), PRODUCT_ID)
+
+    assert panel_client.upload_set(PRODUCT_ID, frames, workers=3, journal=journal) == f"{UPLOAD_ROOT}/{PRODUCT_ID}"
+    assert uploaded(root) == [os.path.basename(path) for path in frames]
+    assert all(UploadJournal(os.path.dirname(frames[0]), PRODUCT_ID).is_uploaded(path) for path in frames)
+    panel_client.close()
+
+
+def test_wrong_password_is_reported(panel):
+    base_url, _ = panel
+    with pytest.raises(PanelError):
+        client(base_url, password="wrong").ensure_login()
+
+
+def test_interrupted_upload_resumes_with_the_remaining_frames(panel, frames, monkeypatch):
+    base_url, root = panel
+    folder = os.path.dirname(frames[0])
+    send = PanelClient.upload_file
+
+    def upload_until_cut(self, directory, path):
+        if path == frames[3]:
+            raise PanelError("connection reset")
+        send(self, directory, path)
+
+    monkeypatch.setattr(PanelClient, "upload_file", upload_until_cut)
+    with pytest.raises(PanelError):
+        client(base_url).upload_set(PRODUCT_ID, frames, workers=1, journal=UploadJournal(folder, PRODUCT_ID))
+    assert os.path.basename(frames[3]) not in uploaded(root)
+
+    sent = []
+    monkeypatch.setattr(PanelClient, "upload_file", lambda self, directory, path: (sent.append(path),
+                                                                                 send(self, directory, path)))
+    client(base_url).upload_set(PRODUCT_ID, frames, workers=2, journal=UploadJournal(folder, PRODUCT_ID))
+    assert sent == [frames[3]]
+    assert uploaded(root) == [os.path.basename(path) for path in frames]
+
+
+def test_stored_cookies_are_reused_and_an_expired_session_logs_in_again(panel, frames, monkeypatch):
+    base_url, root = panel
+    client(base_url).ensure_login()
+
+    logins = []
+    login = PanelClient.login
+    monkeypatch.setattr(PanelClient, "login", lambda self: (logins.append(1), login(self)))
+    panel_client = client(base_url)
+    panel_client.create_directory(PRODUCT_ID)
+    assert logins == []
+
+    panel_client.session.cookies.clear()
+    panel_client.upload_set(PRODUCT_ID, frames[:2])
+    assert logins == [1]
+    assert uploaded(root) == [os.path.basename(path) for path in frames[:2]]
+
+
+def test_file_missing_after_upload_fails_the_set_and_is_unjournaled(panel, frames, monkeypatch):
+    base_url, root = panel
+    folder = os.path.dirname(frames[0])
+    send = PanelClient.upload_file
+    # The panel accepts the request but the file never shows up in the folder
+    monkeypatch.setattr(PanelClient, "upload_file",
+                        lambda self, directory, path: None if path == frames[1] else send(self, directory, path))
+
+    with pytest.raises(PanelError, match=os.path.basename(frames[1])):
+        client(base_url).upload_set(PRODUCT_ID, frames, journal=UploadJournal(folder, PRODUCT_ID))
+    assert not UploadJournal(folder, PRODUCT_ID).is_uploaded(frames[1])
+    assert UploadJournal(folder, PRODUCT_ID).is_uploaded(frames[0])
+
+
+def test_public_files_are_verified(panel, frames):
+    base_url, root = panel
+    directory = client(base_url).upload_set(PRODUCT_ID, frames)
+
+    assert verify_public_files(directory, frames, base_url=base_url + "files/") == {}
+    assert verify_public_files(directory, frames, base_url=base_url + "files/", check_hash=True) == {}
+
+    (root / UPLOAD_ROOT / PRODUCT_ID / os.path.basename(frames[2])).write_bytes(b"truncated")
+    os.remove(root / UPLOAD_ROOT / PRODUCT_ID / os.path.basename(frames[4]))
+    problems = verify_public_files(directory, frames, base_url=base_url + "files/")
+    assert sorted(problems) == [os.path.basename(frames[2]), os.path.basename(frames[4])]
+    assert problems[os.path.basename(frames[4])] == "missing"
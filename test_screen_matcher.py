@@ -0,0 +1,59 @@
+import importlib
+import os
+import sys
+import types
+
+import pytest
+from PIL import Image
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+PHOTOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "photos")
+TEMPLATES = ["obs_wtf", "set_folder", "windows_obs", "windows_search", "folder", "minimalize", "remind_me_later"]
+# Odd offsets land between coarse pixels
+OFFSETS = [(101, 57), (333, 211), (7, 3)]
+
+
+@pytest.fixture
+def screen_matcher(monkeypatch):
+    """screen_matcher with pyautogui.screenshot returning `shown`; pyautogui needs a display to import"""
+    fake = types.SimpleNamespace(shown=None, locateOnScreen=lambda *args, **kwargs: None)
+    fake.screenshot = lambda: fake.shown
+    monkeypatch.setitem(sys.modules, "pyautogui", fake)
+    monkeypatch.delitem(sys.modules, "screen_matcher", raising=False)
+    module = importlib.import_module("screen_matcher")
+    yield module, fake
+    sys.modules.pop("screen_matcher", None)
+
+
+def busy_screen(template_path, offset, seed):
+    noise = np.random.default_rng(seed).integers(0, 255, (900, 1400, 3), dtype=np.uint8)
+    screen = Image.fromarray(noise)
+    screen.paste(Image.open(template_path).convert("RGB"), offset)
+    return screen
+
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_templates_are_found_at_odd_offsets(screen_matcher, name):
+    module, fake = screen_matcher
+    path = os.path.join(PHOTOS, f"{name}.jpg")
+    for seed, offset in enumerate(OFFSETS):
+        fake.shown = busy_screen(path, offset, seed)
+        box = module.TemplateMatcher().locate(path, confidence=0.9)
+        assert box is not None and (box.left, box.top) == offset
+
+
+def test_last_place_is_searched_first_and_moves_are_followed(screen_matcher):
+    module, fake = screen_matcher
+    path = os.path.join(PHOTOS, "set_folder.jpg")
+    matcher = module.TemplateMatcher()
+    for seed, offset in enumerate(OFFSETS):
+        fake.shown = busy_screen(path, offset, seed)
+        assert matcher.locate(path)[:2] == offset
+
+
+def test_missing_template_is_not_found(screen_matcher):
+    module, fake = screen_matcher
+    fake.shown = Image.fromarray(np.random.default_rng(0).integers(0, 255, (600, 800, 3), dtype=np.uint8))
+    assert module.TemplateMatcher().locate(os.path.join(PHOTOS, "windows_obs.jpg")) is None
@@ -0,0 +1,80 @@
+import struct
+import time
+
+import pytest
+
+serial = pytest.importorskip("serial")
+pytest.importorskip("tty", reason="the table simulator needs a pseudo-terminal")
+
+from hardware_handler import HardwareManager
+from table_controller import (STEPS_PER_REV, TMCL_GAP, TMCL_MVP, AP_ACTUAL_POSITION, SerialEngine,
+                              TableControllerError, TablePositioner, build_frame)
+from table_simulator import TableSimulator
+
+@pytest.fixture
+def simulator():
+    sim = TableSimulator(steps_per_second=5_000_000)
+    sim.start()
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def engine(simulator):
+    conn = serial.Serial(simulator.port, baudrate=19200, timeout=0.05)
+    engine = SerialEngine(conn)
+    engine.start()
+    yield engine
+    engine.stop()
+    conn.close()
+
+
+def sent_commands(simulator, command):
+    return [struct.unpack('>BBBBi', frame[:8]) for frame in simulator.received if frame[1] == command]
+
+
+@pytest.mark.parametrize("count", [7, 20, 24, 36])
+def test_step_distances_add_up_to_one_turn(count):
+    positioner = TablePositioner(engine=None)
+    distances = [positioner.step_distance(i, count) for i in range(1, count + 1)]
+    assert sum(distances) == STEPS_PER_REV
+    assert max(distances) - min(distances) <= 1
+
+
+@pytest.mark.parametrize("count", [7, 24])
+def test_a_full_sequence_lands_on_one_revolution(simulator, engine, count):
+    positioner = TablePositioner(engine, poll_interval=0.001)
+    for index in range(1, count + 1):
+        positioner.rotate_step(index, count, timeout=5)
+
+    moves = sent_commands(simulator, TMCL_MVP)
+    assert len(moves) == count
+    assert sum(move[4] for move in moves) == STEPS_PER_REV
+    _status, _command, position = engine.request(build_frame(TMCL_GAP, AP_ACTUAL_POSITION))
+    assert position == STEPS_PER_REV
+
+
+def test_unanswered_command_times_out_and_is_forgotten(simulator, engine):
+    simulator.handle = lambda frame: b''
+    started = time.monotonic()
+    with pytest.raises(TableControllerError):
+        engine.request(build_frame(TMCL_GAP, AP_ACTUAL_POSITION), timeout=0.2)
+    assert time.monotonic() - started < 1
+    assert not engine.pending
+
+
+def test_controller_without_acks_does_not_pile_up_pending_commands(simulator):
+    simulator.handle = lambda frame: b''
+    manager = HardwareManager()
+    assert manager.open_serial(simulator.port)
+    try:
+        assert not manager.expect_acks
+        for _ in range(10):
+            assert manager.send_command(manager.COMMANDS["Stop"], "Stop")
+        deadline = time.monotonic() + 2
+        while len(simulator.received) < 11 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(simulator.received) == 11
+        assert not manager.serial_engine.pending
+    finally:
+        manager.close_serial()
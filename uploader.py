@@ -1,5 +1,4 @@
 import os
-import time
 from flask import Flask, render_template_string
 from threading import Thread
 from selenium import webdriver
@@ -10,76 +9,103 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_uploader import PanelClient, PanelError, UploadJournal, UPLOAD_WORKERS, UPLOAD_ROOT, verify_public_files
+from browser_sessions import BrowserSessionPool
+from page_waits import (StepTimer, until, wait_for_reload, wait_for_selected, wait_for_suggestion, wait_for_work_done,
+                        wait_until_idle)
 
 # Configuration
 WEBSITE_URL = "https://defender.iai-shop.com/panel/cms-files.php"
 CHROME_DRIVER_PATH = r""
 USERNAME = ""
 PASSWORD = ""
-
-
-def wait_for_upload_complete(driver, timeout=120):
-    """Wait for all uploads to complete"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        uploads = driver.find_elements(By.CSS_SELECTOR, "div.upload-progress, div.upload-status")
-        if not uploads:
-            return True
-        time.sleep(2)
-    return False
-
-
-def process_product(driver, product_id, filename):
-    # Go to product page
-    product_url = f"https://defender.iai-shop.com/panel/product.php?idt={product_id}#descriptions"
-    driver.get(product_url)
-    time.sleep(2)
-
+# "browser" uses the file manager UI; "http" uploads files with http_uploader.PanelClient
+# (browser flow as fallback). Switch to "http" only once PANEL_ENDPOINTS has been copied
+# from the panel's real network traffic
+UPLOAD_METHOD = "browser"
+# Check each uploaded frame at http_uploader.PUBLIC_FILES_URL and fail the upload if any is
+# missing. Off until that URL has been confirmed against a real uploaded set
+VERIFY_UPLOADS = False
+# Browsers kept open and logged in between products (batch uploads use one each)
+BROWSER_SESSIONS = 2
+# "full": the visible, maximized window; "light": headless Chrome without images, fonts,
+# trackers, GPU or extensions, to leave CPU and memory to Photoshop and the capture.
+# Switch to "light" once browser_benchmark.py and a full login + upload have been run with it
+BROWSER_PROFILE = "full"
+# Requests the light profile drops; the panel works without them
+BLOCKED_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*",
+]
+# Items of the parameter form's autocomplete list (jQuery UI menu)
+SUGGESTION_SELECTOR = "ul.ui-autocomplete li, ul.ui-menu li"
+
+
+def pick_suggestion(driver, field, text):
+    """Type `text` into an autocomplete field and take the first suggestion once the list shows it"""
+    field.send_keys(text)
+    if not wait_for_suggestion(driver, SUGGESTION_SELECTOR, text):
+        print(f"No suggestion for '{text}' appeared, pressing ENTER anyway")
+    wait_until_idle(driver)
+    field.send_keys(Keys.ENTER)
+
+
+def wait_for_upload_complete(driver, files, timeout=None):
+    """Wait until the upload progress bars have come and gone, or every file is listed in the folder"""
+    timeout = timeout or max(120, 10 * len(files))
+    return wait_for_work_done(driver, "div.upload-progress, div.upload-status",
+                              [os.path.basename(path) for path in files], timeout)
+
+
+def process_product(driver, product_id, filename, timer=None):
+    timer = timer or StepTimer(product_id)
     try:
+        # Go to product page
+        with timer.step("open product page"):
+            product_url = f"https://defender.iai-shop.com/panel/product.php?idt={product_id}#descriptions"
+            driver.get(product_url)
+            add_parameter = until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "a#parameter.nohref.addEl")))
+
         # Add parameter
-        WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "a#parameter.nohref.addEl"))
-        ).click()
-
-        # Fill parameter form
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "fg_inline_parameter"))
-        ).send_keys("Prezentacja 3")
-        time.sleep(2)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "fg_inline_parameter"))
-        ).send_keys(Keys.ENTER)
-        driver.find_element(By.ID, "fg_inline_value1").send_keys("tak")
-        time.sleep(2)
-        driver.find_element(By.ID, "fg_inline_value1").send_keys(Keys.ENTER)
-        driver.find_element(By.CSS_SELECTOR, "input[value='Dodaj']").click()
-        time.sleep(1)
+        with timer.step("add parameter"):
+            add_parameter.click()
+
+            # Fill parameter form; ENTER picks the first suggestion once the list shows it
+            parameter_field = until(driver, EC.presence_of_element_located((By.ID, "fg_inline_parameter")))
+            pick_suggestion(driver, parameter_field, "Prezentacja 3")
+            value_field = until(driver, EC.element_to_be_clickable((By.ID, "fg_inline_value1")))
+            pick_suggestion(driver, value_field, "tak")
+            driver.find_element(By.CSS_SELECTOR, "input[value='Dodaj']").click()
 
         # Click Prezentacja 360
-        driver.find_element(By.CSS_SELECTOR, "div#showMenu_1339430129.nohref.showMenu").click()
-        time.sleep(1)
+        with timer.step("open distinction options"):
+            until(driver, EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, "div#showMenu_1339430129.nohref.showMenu"))).click()
 
-        # Click additional options
-        driver.find_element(By.CSS_SELECTOR, "a#editDistinction_1339430129.nohref.editDistinction").click()
-        time.sleep(2)
+            # Click additional options
+            until(driver, EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, "a#editDistinction_1339430129.nohref.editDistinction"))).click()
 
         # Select radio buttons
-        radio1 = driver.find_element(By.ID, "jsfg_distinction_1")
-        driver.execute_script("arguments[0].click();", radio1)
-        time.sleep(1)
-        radio2 = driver.find_element(By.ID, "jsfg_projector_hide_1")
-        driver.execute_script("arguments[0].click();", radio2)
+        with timer.step("set distinction"):
+            for radio_id in ("jsfg_distinction_1", "jsfg_projector_hide_1"):
+                radio = until(driver, EC.presence_of_element_located((By.ID, radio_id)))
+                driver.execute_script("arguments[0].click();", radio)
+                wait_for_selected(driver, radio)
 
         # Save changes
-        driver.find_element(By.CSS_SELECTOR, "input[value='Zapisz']").click()
-        time.sleep(1)
-        driver.find_element(By.CSS_SELECTOR, "input[value='Zapisz zmiany']").click()
-        time.sleep(2)
+        with timer.step("save product"):
+            driver.find_element(By.CSS_SELECTOR, "input[value='Zapisz']").click()
+            save_button = until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Zapisz zmiany']")))
+            save_button.click()
+            wait_for_reload(driver, save_button)
 
-        # Go to visibility page
-        check_url = f"https://moto-tour.com.pl/projector.php?product={product_id}"
-        driver.get(check_url)
-        time.sleep(10)
+        # Link to the visibility page; the frames themselves are checked by verify_upload (VERIFY_UPLOADS)
+        return f"https://moto-tour.com.pl/projector.php?product={product_id}"
 
     except Exception as e:
         print(f"Error processing product {product_id}: {str(e)}")
@@ -87,145 +113,259 @@ def process_product(driver, product_id, filename):
         return None
 
 
-def upload_files(folder_path, product_id):
-    print(f"\nProcessing folder: {folder_path}")
-    print(f"Using product ID: {product_id}")
+def find_webp_files(folder_path):
+    """WebP frames of a product: its "WEBP Files" folder, or the folder itself"""
+    webp_files_path = os.path.join(folder_path, 'WEBP Files')
+    if not os.path.exists(webp_files_path):
+        print(f"WEBP Files directory not found at: {webp_files_path}")
+        # Try to find WEBP files directly in the folder
+        webp_files_path = folder_path
+
+    return [os.path.join(webp_files_path, f) for f in os.listdir(webp_files_path)
+            if os.path.isfile(os.path.join(webp_files_path, f)) and f.lower().endswith('.webp')]
+
+
+_panel_client = None
+_panel_client_lock = threading.Lock()
+
+
+def panel_client():
+    """One PanelClient for the whole app, so its login and connections are reused"""
+    global _panel_client
+    with _panel_client_lock:
+        if _panel_client is None:
+            _panel_client = PanelClient(USERNAME, PASSWORD, pool_size=max(8, UPLOAD_WORKERS * BROWSER_SESSIONS))
+        return _panel_client
 
+
+def upload_over_http(product_id, files):
+    """Upload through the panel's HTTP endpoints; False if the browser flow should take over"""
+    journal = UploadJournal(os.path.dirname(files[0]), product_id)
     try:
-        chrome_options = Options()
+        print(f"Uploading {len(files)} files over HTTP...")
+        panel_client().upload_set(product_id, files, journal=journal)
+        print("Upload completed successfully")
+        return True
+    except PanelError as e:
+        print(f"HTTP upload failed, falling back to the browser: {e}")
+        return False
+
+
+def login(driver):
+    print("Opening website...")
+    driver.get(WEBSITE_URL)
+
+    print("Entering username...")
+    username_field = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "input#panel_login.form__input"))
+    )
+    username_field.clear()
+    username_field.send_keys(USERNAME)
+
+    print("Entering password...")
+    password_field = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "input#panel_password.form__input"))
+    )
+    password_field.clear()
+    password_field.send_keys(PASSWORD)
+
+    print("Submitting form...")
+    password_field.send_keys(Keys.RETURN)
+    wait_for_reload(driver, password_field)
+    driver.get(WEBSITE_URL)
+
+    WebDriverWait(driver, 160).until(
+        EC.visibility_of_element_located((By.ID, "name_span_1_302"))
+    )
+    print("Login successful. Starting upload process...")
+
+
+def verify_upload(product_id, files):
+    """True if the shop serves every frame of the set with its local size"""
+    problems = verify_public_files(f"{UPLOAD_ROOT}/{product_id}", files)
+    for name in sorted(problems, key=lambda name: (len(name), name)):
+        print(f"[X] {name}: {problems[name]}")
+    if problems:
+        print(f"Upload verification failed: {len(problems)} of {len(files)} frames not served by the shop")
+        return False
+    print(f"Upload verified: all {len(files)} frames are online")
+    return True
+
+
+def create_driver(profile=None):
+    profile = profile or BROWSER_PROFILE
+    chrome_options = Options()
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    if profile == "light":
+        for argument in ("--headless=new", "--window-size=1280,900", "--disable-gpu", "--disable-extensions",
+                         "--blink-settings=imagesEnabled=false", "--mute-audio", "--no-first-run",
+                         "--disable-background-networking", "--disable-sync"):
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    else:
         chrome_options.add_argument("--start-maximized")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-
-        service = Service(CHROME_DRIVER_PATH)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.implicitly_wait(5)
-
-        print("Opening website...")
-        driver.get(WEBSITE_URL)
-
-        print("Entering username...")
-        username_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input#panel_login.form__input"))
-        )
-        username_field.clear()
-        username_field.send_keys(USERNAME)
-
-        print("Entering password...")
-        password_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input#panel_password.form__input"))
-        )
-        password_field.clear()
-        password_field.send_keys(PASSWORD)
-
-        print("Submitting form...")
-        password_field.send_keys(Keys.RETURN)
-        time.sleep(2)
-        driver.get(WEBSITE_URL)
-
-        WebDriverWait(driver, 160).until(
-            EC.visibility_of_element_located((By.ID, "name_span_1_302"))
-        )
-        print("Login successful. Starting upload process...")
-        time.sleep(3)
 
+    service = Service(CHROME_DRIVER_PATH)
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.implicitly_wait(5)
+    if profile == "light":
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+def is_logged_in(driver):
+    driver.get(WEBSITE_URL)
+    try:
+        WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.ID, "name_span_1_302")))
+        return True
+    except Exception:
+        return False
+
+
+browser_pool = BrowserSessionPool(create_driver, login, is_logged_in, WEBSITE_URL, size=BROWSER_SESSIONS)
+
+
+def upload_in_browser(driver, product_id, files, timer=None):
+    """Create the product folder in the CMS file manager and upload `files` through its dialog"""
+    timer = timer or StepTimer(product_id)
+    with timer.step("open upload folder"):
         print("Navigating to skaner-3d...")
         driver.execute_script("""
             const span = Array.from(document.querySelectorAll('span'))
                 .find(el => el.textContent.trim() === 'skaner-3d');
             if (span) span.click();
         """)
-        time.sleep(2)
+        wait_until_idle(driver)
 
-        try:
-            print("Creating directory...")
-            WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Dodaj katalog']"))
-            ).click()
-            time.sleep(1)
+    with timer.step("create directory"):
+        print("Creating directory...")
+        until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Dodaj katalog']")), 15).click()
 
-            driver.find_element(By.ID, "fg_dir_name").send_keys(product_id)
-            time.sleep(0.5)
+        until(driver, EC.visibility_of_element_located((By.ID, "fg_dir_name"))).send_keys(product_id)
+        # A JavaScript click, since the icon has no size when images are not loaded
+        driver.execute_script("arguments[0].click();", driver.find_element(By.CSS_SELECTOR, "img[onclick*='addDir']"))
 
-            driver.find_element(By.CSS_SELECTOR, "img[onclick*='addDir']").click()
-            time.sleep(2)
+        print("Opening folder...")
+        # Wait for the folder element to be present
+        folder_element = until(driver, EC.presence_of_element_located((By.XPATH, f"//span[text()='{product_id}']")), 15)
 
-            print("Opening folder...")
-            # Wait for the folder element to be present
-            folder_element = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.XPATH, f"//span[text()='{product_id}']"))
-            )
+        # Click the element using JavaScript to avoid interception
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", folder_element)
+        driver.execute_script("arguments[0].click();", folder_element)
+        wait_until_idle(driver)
 
-            # Scroll the element into view with JavaScript
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});",
-                                  folder_element)
+    if files:
+        with timer.step("upload files"):
+            print(f"Uploading {len(files)} files...")
+            until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Dodaj pliki']")), 15).click()
 
-            # Small pause for the scroll to complete
-            time.sleep(1.5)
+            file_input = until(driver, EC.presence_of_element_located((By.XPATH, "//input[@type='file']")))
+            file_input.send_keys("\n".join(files))
 
-            # Click the element using JavaScript to avoid interception
-            driver.execute_script("arguments[0].click();", folder_element)
+            if not wait_for_upload_complete(driver, files):
+                print("Warning: Upload timeout reached")
+            else:
+                wait_until_idle(driver)
+                print("Upload completed successfully")
 
-            # Wait for any resulting page changes
-            time.sleep(2)
+        print("Closing upload window...")
+        try:
+            close_button = until(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "a.container-close[href='#']")))
+            close_button.click()
+        except Exception as e:
+            print(f"Could not find Close button: {str(e)}")
+            driver.save_screenshot(f"close_error_{product_id}.png")
 
-            # Look for WEBP files in the folder
-            webp_files_path = os.path.join(folder_path, 'WEBP Files')
-            if not os.path.exists(webp_files_path):
-                print(f"WEBP Files directory not found at: {webp_files_path}")
-                # Try to find WEBP files directly in the folder
-                webp_files_path = folder_path
 
-            files = [os.path.join(webp_files_path, f) for f in os.listdir(webp_files_path)
-                     if os.path.isfile(os.path.join(webp_files_path, f)) and f.lower().endswith('.webp')]
+def upload_files(folder_path, product_id):
+    print(f"\nProcessing folder: {folder_path}")
+    print(f"Using product ID: {product_id}")
 
-            if files:
-                print(f"Uploading {len(files)} files...")
-                WebDriverWait(driver, 15).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Dodaj pliki']"))
-                ).click()
-                time.sleep(3)
-
-                file_input = driver.find_element(By.XPATH, "//input[@type='file']")
-                file_input.send_keys("\n".join(files))
-                time.sleep(45)
-
-                if not wait_for_upload_complete(driver):
-                    print("Warning: Upload timeout reached")
-                else:
-                    print("Upload completed successfully")
-
-                print("Closing upload window...")
-                try:
-                    close_button = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "a.container-close[href='#']"))
-                    )
-                    close_button.click()
-                    time.sleep(1)
-                except Exception as e:
-                    print(f"Could not find Close button: {str(e)}")
-                    driver.save_screenshot(f"close_error_{product_id}.png")
+    timer = StepTimer(product_id)
+    try:
+        files = find_webp_files(folder_path)
+        # Direct HTTP needs no browser for the file manager; the product page below still does
+        with timer.step("http upload"):
+            uploaded = UPLOAD_METHOD == "http" and bool(files) and upload_over_http(product_id, files)
+
+        with timer.step("browser session"):
+            driver = browser_pool.acquire()
+        try:
+            if not uploaded:
+                upload_in_browser(driver, product_id, files, timer)
+
+            if files and VERIFY_UPLOADS:
+                # Do not mark the product as 360 while frames are missing
+                with timer.step("verify upload"):
+                    verified = verify_upload(product_id, files)
+                if not verified:
+                    browser_pool.release(driver)
+                    return False
 
             # Process the product
             if files:
                 filename = os.path.splitext(files[0])[0]  # Get filename without extension
                 print(f"\nProcessing product: {product_id} (File: {filename})")
 
-                product_link = process_product(driver, product_id, filename)
+                product_link = process_product(driver, product_id, filename, timer)
 
                 if product_link:
                     print(f"Successfully processed: {product_link}")
                 else:
                     print(f"Failed to process product {product_id}")
 
-            driver.quit()
+            browser_pool.release(driver)
             return True
 
         except Exception as e:
             print(f"Error processing {product_id}: {str(e)}")
             driver.save_screenshot(f"error_{product_id}.png")
-            driver.quit()
+            # The page state is unknown, so start the next product with a fresh browser
+            browser_pool.release(driver, broken=True)
             return False
 
     except Exception as e:
         print(f"Error processing {product_id}: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+    finally:
+        print(timer.report())
+
+
+def update_product(product_id):
+    """Add the 360 parameter and distinction to one product; (success, seconds, projector URL or error)"""
+    timer = StepTimer(product_id)
+    try:
+        with timer.step("browser session"):
+            driver = browser_pool.acquire()
+    except Exception as e:
+        return False, timer.total(), f"no browser session: {e}"
+    try:
+        product_link = process_product(driver, product_id, None, timer)
+    except Exception as e:
+        browser_pool.release(driver, broken=True)
+        return False, timer.total(), str(e)
+    browser_pool.release(driver)
+    return bool(product_link), timer.total(), product_link or "product page update failed"
+
+
+def update_products(product_ids, workers=BROWSER_SESSIONS, progress_callback=None):
+    """Run update_product for many products on the shared logged-in browsers.
+
+    At most `workers` products are open at once (never more than the browser
+    pool holds). Returns one report line per product, in input order;
+    `progress_callback(done, total, message)` is called after each one.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, browser_pool.size))) as pool:
+        futures = {pool.submit(update_product, product_id): product_id for product_id in product_ids}
+        for future in as_completed(futures):
+            product_id = futures[future]
+            success, seconds, detail = future.result()
+            results[product_id] = (f"{product_id}: OK [{seconds:.0f}s]" if success
+                                   else f"{product_id}: FAILED ({detail}) [{seconds:.0f}s]")
+            print(results[product_id])
+            if progress_callback:
+                progress_callback(len(results), len(product_ids), results[product_id])
+    return [results[product_id] for product_id in product_ids]
@@ -0,0 +1,113 @@
+import re
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "2-1    04a9:32d4  Canon EOS 250D                Shared"
+DEVICE_LINE_RE = re.compile(r'^(\d+-\d+)\s+([0-9a-fA-F]{4}:[0-9a-fA-F]{4})\s+(.*?)\s{2,}(\S.*?)\s*$')
+
+CAMERA_KEYWORDS = ['canon', 'nikon', 'sony', 'fuji', 'olympus', 'panasonic',
+                   'ptp', 'picture transfer', 'camera', 'dslr']
+CAMERA_VENDOR_IDS = {'04a9', '04b0', '054c', '04cb', '07b4', '04da'}
+
+
+class UsbDevice:
+    def __init__(self, busid, vid_pid, description, state):
+        self.busid = busid
+        self.vid_pid = vid_pid.lower()
+        self.description = description
+        self.state = state
+
+    @property
+    def shared(self):
+        """Bound for sharing (includes devices currently attached to WSL)"""
+        return not self.state.lower().startswith('not shared')
+
+    @property
+    def attached(self):
+        return self.state.lower().startswith('attached')
+
+    def looks_like_camera(self):
+        description = self.description.lower()
+        return (self.vid_pid.split(':')[0] in CAMERA_VENDOR_IDS or
+                any(keyword in description for keyword in CAMERA_KEYWORDS))
+
+    def __repr__(self):
+        return f"UsbDevice({self.busid!r}, {self.vid_pid!r}, {self.description!r}, {self.state!r})"
+
+
+def parse_usbipd_list(output):
+    """Parse the 'Connected:' table of `usbipd list` into UsbDevice objects"""
+    devices = []
+    for line in output.splitlines():
+        if line.strip().lower().startswith('persisted'):
+            break
+        match = DEVICE_LINE_RE.match(line.strip())
+        if match:
+            devices.append(UsbDevice(*match.groups()))
+    return devices
+
+
+def run_usbipd(args, timeout=10):
+    """Run usbipd directly, falling back to PowerShell when it is not on PATH"""
+    try:
+        return subprocess.run(['usbipd'] + args, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        return subprocess.run(["powershell", "-Command", "usbipd " + " ".join(args)],
+                              capture_output=True, text=True, timeout=timeout)
+
+
+class UsbInventory:
+    """Short-lived cache of `usbipd list`, shared by everything that asks about USB devices"""
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._devices = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def devices(self, refresh=False):
+        """Current device list; None if usbipd could not be queried"""
+        with self._lock:
+            if refresh or self._devices is None or time.monotonic() - self._fetched_at > self.ttl:
+                try:
+                    result = run_usbipd(['list'])
+                except Exception as e:
+                    logger.error(f"usbipd list failed: {e}")
+                    return None
+                if result.returncode != 0:
+                    logger.error(f"usbipd list failed: {result.stderr}")
+                    return None
+                self._devices = parse_usbipd_list(result.stdout)
+                self._fetched_at = time.monotonic()
+            return list(self._devices)
+
+    def invalidate(self):
+        """Forget the cached list, e.g. after bind/attach/detach changed device states"""
+        with self._lock:
+            self._devices = None
+
+    def find(self, busid):
+        for device in self.devices() or []:
+            if device.busid == busid:
+                return device
+        return None
+
+    def find_camera(self):
+        for device in self.devices() or []:
+            if device.looks_like_camera():
+                return device
+        return None
+
+    def run(self, args, timeout=10):
+        """Run a state-changing usbipd command and drop the cache afterwards"""
+        try:
+            return run_usbipd(args, timeout=timeout)
+        finally:
+            self.invalidate()
+
+
+usb_inventory = UsbInventory()
@@ -0,0 +1,74 @@
+"""Compare WebP encoding profiles on a sample 360 set.
+
+    python webp_benchmark.py "Zdjecia360/<produkt>/PNG Files" [--profiles web-fast archive]
+
+For each profile prints total encode time, total output size and mean PSNR
+against the (resized) source frames.
+"""
+import argparse
+import io
+import math
+import os
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+from webp_handler import ENCODING_PROFILES, prepare_image, save_webp
+
+
+def psnr(reference, candidate):
+    """Peak signal-to-noise ratio in dB; inf for identical images"""
+    diff = ImageChops.difference(reference.convert("RGB"), candidate.convert("RGB"))
+    mse = sum(rms ** 2 for rms in ImageStat.Stat(diff).rms) / 3
+    if mse == 0:
+        return math.inf
+    return 20 * math.log10(255 / math.sqrt(mse))
+
+
+def benchmark_profile(frames, profile):
+    """Encode every frame in memory; returns (seconds, bytes, mean PSNR)"""
+    seconds = 0.0
+    total_bytes = 0
+    scores = []
+    for frame in frames:
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        save_webp(frame, buffer, profile)
+        seconds += time.perf_counter() - started
+        total_bytes += buffer.tell()
+        buffer.seek(0)
+        with Image.open(buffer) as encoded:
+            scores.append(psnr(prepare_image(frame, profile), encoded))
+    return seconds, total_bytes, sum(scores) / len(scores)
+
+
+def load_frames(png_folder):
+    frames = []
+    for filename in sorted(os.listdir(png_folder)):
+        if filename.lower().endswith(".png"):
+            with Image.open(os.path.join(png_folder, filename)) as img:
+                img.load()
+                frames.append(img)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebP encoding profiles")
+    parser.add_argument("png_folder", help="folder with the PNG frames of one product")
+    parser.add_argument("--profiles", nargs="+", default=list(ENCODING_PROFILES),
+                        choices=list(ENCODING_PROFILES))
+    args = parser.parse_args()
+
+    frames = load_frames(args.png_folder)
+    if not frames:
+        parser.error(f"no PNG files in {args.png_folder}")
+
+    print(f"{len(frames)} frames, {frames[0].size[0]}x{frames[0].size[1]}")
+    print(f"{'profile':<14}{'time [s]':>10}{'size [KB]':>12}{'PSNR [dB]':>11}")
+    for profile in args.profiles:
+        seconds, total_bytes, score = benchmark_profile(frames, profile)
+        print(f"{profile:<14}{seconds:>10.2f}{total_bytes / 1024:>12.0f}{score:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,223 @@
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tkinter import Tk, filedialog, messagebox
 from PIL import Image
 
-def convert_folder(png_folder):
+FRAMES_PER_SET = 20
+
+# Pillow WebP options per profile; max_size (longest edge in px) resizes before encoding.
+# "max" is the original quality=100 setting.
+ENCODING_PROFILES = {
+    "max": {"quality": 100, "method": 4},
+    "web-fast": {"quality": 80, "method": 2, "max_size": 1600},
+    "web-balanced": {"quality": 85, "method": 5, "max_size": 2000},
+    "archive": {"lossless": True, "quality": 100, "method": 6},
+}
+DEFAULT_PROFILE = "max"
+
+# Kept in every "WEBP Files" folder; records which source and profile produced each frame
+MANIFEST_NAME = ".webp_manifest.json"
+
+
+def default_workers():
+    """One encoder process per core"""
+    return os.cpu_count() or 1
+
+
+def print_progress(done, total, message):
+    print(message)
+
+
+def prepare_image(img, profile=DEFAULT_PROFILE):
+    """Apply the profile's resize; returns the image to encode"""
+    max_size = ENCODING_PROFILES[profile].get("max_size")
+    if max_size and max(img.size) > max_size:
+        img = img.copy()
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+    return img
+
+
+def save_webp(img, output, profile=DEFAULT_PROFILE):
+    """Encode `img` to `output` (path or file object) with a named profile"""
+    options = {key: value for key, value in ENCODING_PROFILES[profile].items() if key != "max_size"}
+    prepare_image(img, profile).save(output, "WEBP", **options)
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": file_hash(path)}
+
+
+def encode_frame(input_path, output_path, profile=DEFAULT_PROFILE):
+    """Encode one PNG to WebP and return the source's fingerprint; runs in a worker process"""
+    with Image.open(input_path) as img:
+        save_webp(img, output_path, profile)
+    return fingerprint(input_path)
+
+
+class ConversionManifest:
+    """Source mtime/size/hash for each WebP in one output folder, to skip unchanged frames"""
+
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.changed = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.frames = json.load(f).get("frames", {})
+        except (OSError, ValueError, AttributeError):
+            self.frames = {}
+
+    def is_current(self, input_path, output_path, profile):
+        """True if output_path was encoded from the current input_path with `profile`"""
+        entry = self.frames.get(os.path.basename(output_path))
+        if (not entry or entry.get("profile") != profile or
+                entry.get("source") != os.path.basename(input_path) or not os.path.exists(output_path)):
+            return False
+        stat = os.stat(input_path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime == entry["mtime"]:
+            return True
+        # Touched but possibly identical (re-saved, copied back); only the hash can tell
+        if file_hash(input_path) != entry["sha1"]:
+            return False
+        entry["mtime"] = stat.st_mtime
+        self.changed = True
+        return True
+
+    def record(self, input_path, output_path, profile, source_fingerprint):
+        self.frames[os.path.basename(output_path)] = dict(source_fingerprint, source=os.path.basename(input_path),
+                                                          profile=profile)
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"frames": self.frames}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self.changed = False
+        except OSError as e:
+            print(f"[X] Nie można zapisać {self.path}: {e}")
+
+
+def folder_jobs(png_folder, progress_callback=print_progress):
+    """(input, output) pairs for one "PNG Files" folder, or [] if it is not a full set"""
     files = sorted([
         f for f in os.listdir(png_folder)
         if f.lower().endswith(".png")
     ])
 
-    if len(files) != 20:
-        print(f"[!] Pomijam: {png_folder} — znaleziono {len(files)} plików, nie 20.")
-        return
+    if len(files) != FRAMES_PER_SET:
+        progress_callback(0, 0, f"[!] Pomijam: {png_folder} — znaleziono {len(files)} plików, nie {FRAMES_PER_SET}.")
+        return []
 
     output_folder = os.path.join(os.path.dirname(png_folder), "WEBP Files")
     os.makedirs(output_folder, exist_ok=True)
 
-    for i, filename in enumerate(files):
-        input_path = os.path.join(png_folder, filename)
-        output_filename = f"img_0_0_{i}.webp"
-        output_path = os.path.join(output_folder, output_filename)
+    return [(os.path.join(png_folder, filename), os.path.join(output_folder, f"img_0_0_{i}.webp"))
+            for i, filename in enumerate(files)]
 
-        try:
-            with Image.open(input_path) as img:
-                img.save(output_path, "WEBP", quality=100)
-            print(f"✓ {output_filename}")
-        except Exception as e:
-            print(f"[X] Błąd przy {filename}: {e}")
-
-def process_all(root_folder):
-    converted_any = False
+
+def encode_all(jobs, workers=None, progress_callback=print_progress, profile=DEFAULT_PROFILE):
+    """Encode (input, output) pairs on a process pool.
+
+    Returns (encoded, failures): (input, output, source fingerprint) for every
+    frame written, and the number of frames that failed.
+    """
+    encoded = []
+    if not jobs:
+        return encoded, 0
+    workers = min(workers or default_workers(), len(jobs))
+    failures = 0
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(encode_frame, input_path, output_path, profile): (input_path, output_path)
+                   for input_path, output_path in jobs}
+        for future in as_completed(futures):
+            input_path, output_path = futures[future]
+            done += 1
+            try:
+                encoded.append((input_path, output_path, future.result()))
+                progress_callback(done, len(jobs), f"✓ {os.path.basename(output_path)}")
+            except Exception as e:
+                failures += 1
+                progress_callback(done, len(jobs), f"[X] Błąd przy {os.path.basename(input_path)}: {e}")
+    return encoded, failures
+
+
+def convert_jobs(jobs, workers=None, progress_callback=print_progress, profile=DEFAULT_PROFILE, incremental=True):
+    """Encode the frames whose WebP is missing or out of date; returns the number of failures"""
+    manifests = {}
+    for output_folder in sorted({os.path.dirname(output_path) for _, output_path in jobs}):
+        manifests[output_folder] = ConversionManifest(output_folder)
+
+    if incremental:
+        stale = [(input_path, output_path) for input_path, output_path in jobs
+                 if not manifests[os.path.dirname(output_path)].is_current(input_path, output_path, profile)]
+        if len(stale) < len(jobs):
+            progress_callback(0, 0, f"= Bez zmian: {len(jobs) - len(stale)} z {len(jobs)} klatek, pomijam")
+        jobs = stale
+
+    encoded, failures = encode_all(jobs, workers, progress_callback, profile)
+    for input_path, output_path, source_fingerprint in encoded:
+        manifests[os.path.dirname(output_path)].record(input_path, output_path, profile, source_fingerprint)
+    for manifest in manifests.values():
+        manifest.save()
+    return failures
+
+
+def convert_folder(png_folder, workers=None, progress_callback=print_progress, profile=DEFAULT_PROFILE,
+                   incremental=True):
+    """Convert one "PNG Files" folder; True if every frame is encoded and up to date"""
+    jobs = folder_jobs(png_folder, progress_callback)
+    return bool(jobs) and convert_jobs(jobs, workers, progress_callback, profile, incremental) == 0
+
+
+def find_png_folders(root_folder):
+    png_folders = []
     for dirpath, dirnames, filenames in os.walk(root_folder):
         for dirname in dirnames:
             if dirname == "PNG Files":
-                png_folder = os.path.join(dirpath, dirname)
-                print(f"\n== Przetwarzam: {png_folder} ==")
-                convert_folder(png_folder)
-                converted_any = True
-
-    if converted_any:
-        messagebox.showinfo("Gotowe", "Wszystkie konwersje zakończone!")
-    else:
-        messagebox.showwarning("Brak danych", "Nie znaleziono żadnych folderów 'PNG Files' z dokładnie 20 zdjęciami.")
+                png_folders.append(os.path.join(dirpath, dirname))
+    return png_folders
+
+
+def process_all(root_folder, workers=None, progress_callback=None, profile=DEFAULT_PROFILE, incremental=True):
+    """Convert every "PNG Files" folder under root_folder with one shared process pool.
+
+    With `incremental`, frames whose source is unchanged since the last run
+    (per MANIFEST_NAME) are skipped. Without a progress_callback, progress is
+    printed and the result shown in a message box (standalone use). Returns
+    True if at least one full set was found and nothing failed.
+    """
+    callback = progress_callback or print_progress
+    jobs = []
+    for png_folder in find_png_folders(root_folder):
+        callback(0, 0, f"\n== Przetwarzam: {png_folder} ==")
+        jobs.extend(folder_jobs(png_folder, callback))
+
+    failures = convert_jobs(jobs, workers, callback, profile, incremental)
+
+    if progress_callback is None:
+        if jobs:
+            messagebox.showinfo("Gotowe", "Wszystkie konwersje zakończone!")
+        else:
+            messagebox.showwarning("Brak danych", "Nie znaleziono żadnych folderów 'PNG Files' z dokładnie 20 zdjęciami.")
+    return bool(jobs) and failures == 0
+
 
 def select_folder():
     root = Tk()
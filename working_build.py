@@ -38,7 +38,19 @@ def create_data_files():
         'auto_process.jsx',
         'hardware_handler.py',
         'webp_handler.py',
-        'uploader.py'
+        'uploader.py',
+        'gphoto_session.py',
+        'table_controller.py',
+        'settings.py',
+        'usb_inventory.py',
+        'device_monitor.py',
+        'capture_retry.py',
+        'capture_files.py',
+        'image_pipeline.py',
+        'batch_queue.py',
+        'http_uploader.py',
+        'browser_sessions.py',
+        'page_waits.py'
     ]
 
     for file in files_to_include: